@@ -0,0 +1,221 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+from jsonfile import JsonGzip
+from listasdictjsonfile import ListAsDictJsonGzip, ListAsDictJsonText
+import logging.config
+from partitionedjsonfile import PartitionedJsonGzip
+from pathlib import Path
+import platform
+import sys
+import tempfile
+import time
+import types
+
+
+def install_reddit_stand_in():
+    class RedditErrorItem:
+        def __init__(self, error_type: str, field: str = None, message: str = None):
+            self.error_type = error_type
+            self.field = field
+            self.message = message
+
+        @property
+        def error_message(self) -> str:
+            return f'{self.error_type}: {self.message!r}' + (f' on field {self.field!r}' if self.field else '')
+
+    class RedditAPIException(Exception):
+        def __init__(self, items=None):
+            super().__init__(items)
+            self.items = [RedditErrorItem(item[0], field=item[2], message=item[1]) if isinstance(item, list) else item
+                          for item in items or []]
+
+    class Reddit:
+        def __init__(self, *args, **kwargs):
+            raise Exception('Reddit is not available in the benchmark')
+
+    class ServerError(Exception):
+        pass
+
+    praw = types.ModuleType('praw')
+    praw.Reddit = Reddit
+    praw.exceptions = types.ModuleType('praw.exceptions')
+    praw.exceptions.RedditAPIException = RedditAPIException
+    praw.exceptions.RedditErrorItem = RedditErrorItem
+    prawcore = types.ModuleType('prawcore')
+    prawcore.exceptions = types.ModuleType('prawcore.exceptions')
+    prawcore.exceptions.ServerError = ServerError
+    sys.modules.update({
+        'praw': praw,
+        'praw.exceptions': praw.exceptions,
+        'prawcore': prawcore,
+        'prawcore.exceptions': prawcore.exceptions})
+
+
+def load_templates() -> list:
+    templates = []
+    for filename in ['telex2.json.gz', 'telex.json.gz']:
+        telex_json = JsonGzip(filename)
+        if not telex_json.try_read():
+            continue
+        for k, v in telex_json.items():
+            article_date = v.get('article_date', '')
+            if not article_date.startswith('20'):
+                continue
+            templates.append({
+                'slug': k.rsplit('/', 1)[-1],
+                'title': v.get('article_title', k),
+                'category': v.get('category', 'belfold'),
+                'pubDate': int(datetime.fromisoformat(article_date.rstrip('Z')).replace(tzinfo=timezone.utc).timestamp())})
+    if not templates:
+        raise Exception('No template articles')
+    templates.sort(key=lambda item: item['pubDate'])
+    return templates
+
+
+def create_article(article_id: int, template: dict, pub_date: int) -> dict:
+    return {
+        'id': article_id,
+        'active': True,
+        'contentType': 'article',
+        'english': article_id % 50 == 0,
+        'lead': template['title'] * 3,
+        'mainSuperTag': {'id': 1, 'name': template['category'].capitalize(), 'slug': template['category']},
+        'pubDate': pub_date,
+        'slug': f'{template["slug"]}-{article_id}',
+        'tags': [{'id': article_id % 97, 'name': 'tag', 'slug': 'tag'}],
+        'title': template['title'],
+        'type': 'article'}
+
+
+def create_archive(templates: list, count: int) -> list:
+    span = templates[-1]['pubDate'] - templates[0]['pubDate'] + 86400
+    articles = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        generation = i // len(templates)
+        articles.append(create_article(i + 1, template, template['pubDate'] - (count // len(templates) - generation) * span))
+    return articles
+
+
+def create_telex2(articles_json: ListAsDictJsonText, pending_ratio: float, work_path: Path) -> PartitionedJsonGzip:
+    telex2_json = PartitionedJsonGzip(work_path.joinpath('telex2'))
+    pending_every = int(1 / pending_ratio) if pending_ratio > 0 else 0
+    for k, v in articles_json.items():
+        article_date = datetime.fromtimestamp(v['pubDate'], tz=timezone.utc)
+        entry = {
+            'article_date': article_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'article_title': v['title'],
+            'category': v['mainSuperTag']['slug'],
+            'date_dir': article_date.strftime('%Y/%m/%d')}
+        if (pending_every == 0) or (k % pending_every != 0):
+            entry['reddit_date'] = (article_date + timedelta(minutes=30)).strftime('%Y-%m-%dT%H:%M:%SZ')
+            entry['reddit_url'] = f'/r/telex/comments/{k:x}/{v["slug"][:40]}/'
+        dict.__setitem__(telex2_json, v['slug'], entry)
+    telex2_json.rebalance()
+    return telex2_json
+
+
+def load_pages(patterns: list, archive: list, page_count: int, per_page: int) -> list:
+    pages = []
+    for pattern in patterns:
+        for path in sorted(Path().glob(pattern)):
+            json_data = json.loads(path.read_text(encoding='utf-8'))
+            pages.append(json_data['items'] if isinstance(json_data, dict) else json_data)
+    if pages:
+        return pages
+    newest = archive[-page_count * per_page:]
+    for i in range(page_count):
+        page = []
+        for article in reversed(newest[len(newest) - (i + 1) * per_page:len(newest) - i * per_page]):
+            item = json.loads(json.dumps(article))
+            item['title'] = item['title'] + ' (frissítve)'
+            item['facebookEngagement'] = {'shareCount': item['id'] % 1000}
+            page.append(item)
+        pages.append(page)
+    return pages
+
+
+def timed(results: dict, name: str, function):
+    start = time.perf_counter()
+    value = function()
+    results[name] = round(time.perf_counter() - start, 6)
+    return value
+
+
+def benchmark(telex2reddit, templates: list, count: int, args, work_path: Path) -> dict:
+    results = {'articles': count}
+    archive = create_archive(templates, count)
+    articles_json = ListAsDictJsonGzip(work_path.joinpath('articles.json.gz'))
+    timed(results, 'read_list', lambda: articles_json.read_list(archive))
+    del archive
+    telex2_json = create_telex2(articles_json, args.pending_ratio, work_path)
+    telex2_json.write()
+    telex2_json.read()
+    newest_ids = sorted(articles_json)[-args.page_count * args.per_page:]
+    pages = load_pages(args.pages, [dict(articles_json[k], id=k) for k in newest_ids], args.page_count, args.per_page)
+
+    def merge() -> set:
+        articles = ListAsDictJsonText()
+        changed_ids = set()
+        for page in pages:
+            articles.read_list(page)
+            for k, v in articles.items():
+                v.pop('facebookEngagement', None)
+                if k in articles_json:
+                    recorded = telex2reddit.change_log.recorded
+                    telex2reddit.update_item(str(k), v, articles_json[k])
+                    if telex2reddit.change_log.recorded != recorded:
+                        changed_ids.add(k)
+                else:
+                    articles_json[k] = v
+                    changed_ids.add(k)
+        telex2reddit.change_log.flush()
+        return changed_ids
+
+    changed_ids = timed(results, 'update_item', merge)
+    telex_config = telex2reddit.ConfigSection('telex', {
+        'expected_types': 'article,liveblog,longform,picture',
+        'ignore_types': 'liveblogpost'})
+    timed(results, 'project_articles', lambda: telex2reddit.project_articles(articles_json, telex2_json, telex_config, changed_ids))
+    oldest_url, remaining_articles = timed(results, 'find_oldest_article', lambda: telex2reddit.find_oldest_article(telex2_json))
+    results['remaining_articles'] = remaining_articles
+    timed(results, 'articles_write', lambda: articles_json.write())
+    timed(results, 'telex2_write', lambda: telex2_json.write())
+    results['articles_bytes'] = articles_json.path.stat().st_size
+    results['telex2_bytes'] = sum(path.stat().st_size for path in telex2_json.directory.glob('*.json.gz'))
+    results['telex2_hot_items'] = len(telex2_json)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the ingest, merge and persist cycle on synthetic archives')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma separated archive sizes')
+    parser.add_argument('--pages', action='append', default=[], help='glob of recorded API pages (articles.api.json)')
+    parser.add_argument('--page-count', type=int, default=4)
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--pending-ratio', type=float, default=0.001)
+    parser.add_argument('--output', default='benchmark_cycle.json')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    install_reddit_stand_in()
+    import telex2reddit
+
+    templates = load_templates()
+    runs = []
+    for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = benchmark(telex2reddit, templates, size, args, Path(work_dir))
+        print(json.dumps(results))
+        runs.append(results)
+    output = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs}
+    Path(args.output).write_text(json.dumps(output, indent='\t'), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import io
+import json
+import levelfilter
+import log_config
+import logging.config
+import queue
+import sys
+import timeit
+
+LEVELS = [logging.DEBUG, logging.INFO, logging.INFO, logging.INFO, logging.WARNING, logging.ERROR]
+FORMATS = {
+    logging.NOTSET: '[{asctime}] {message}',
+    logging.DEBUG: '\u001b[30m[{asctime}] {message}\u001b[0m',
+    logging.INFO: '\u001b[37m[{asctime}] {message}\u001b[0m',
+    logging.WARNING: '\u001b[31m[{asctime}] {message}\u001b[0m',
+    logging.ERROR: '\u001b[7m\u001b[31m[{asctime}] {message}\u001b[0m',
+    logging.CRITICAL: '\u001b[7m\u001b[35m[{asctime}] {message}\u001b[0m'}
+FILTERS = {
+    logging.NOTSET: levelfilter.NotsetLevelFilter,
+    logging.DEBUG: levelfilter.DebugLevelFilter,
+    logging.INFO: levelfilter.InfoLevelFilter,
+    logging.WARNING: levelfilter.WarningLevelFilter,
+    logging.ERROR: levelfilter.ErrorLevelFilter,
+    logging.CRITICAL: levelfilter.CriticalLevelFilter}
+
+
+def create_logger(name: str, handlers: list) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.NOTSET)
+    for handler in handlers:
+        logger.addHandler(handler)
+    return logger
+
+
+def stacked_filter_handlers(stream) -> list:
+    handlers = []
+    for level, fmt in FORMATS.items():
+        handler = logging.StreamHandler(stream)
+        handler.setLevel(level)
+        handler.addFilter(FILTERS[level]())
+        handler.setFormatter(logging.Formatter(fmt, '%H:%M:%S', '{'))
+        handlers.append(handler)
+    return handlers
+
+
+def level_router_handlers(stream) -> list:
+    sinks = {logging.getLevelName(level): {'format': fmt, 'datefmt': '%H:%M:%S', 'style': '{'} for level, fmt in FORMATS.items()}
+    return [levelfilter.LevelRouterHandler(sinks, stream)]
+
+
+def queued_caller_seconds(count: int, repeat: int) -> list:
+    times = []
+    for i in range(repeat):
+        log_queue = queue.Queue()
+        listener = log_config.BatchingQueueListener(log_queue, *level_router_handlers(io.StringIO()))
+        logger = create_logger(f'benchmark.queued_router.{i}', [log_config.BoundedQueueHandler(log_queue, 'block')])
+        listener.start()
+        times.append(timeit.timeit(lambda: run(logger, count), number=1))
+        listener.stop()
+    return times
+
+
+def run(logger: logging.Logger, count: int):
+    for i in range(count):
+        logger.log(LEVELS[i % len(LEVELS)], f'message {i}')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = 5
+    results = {}
+    for name, factory in [('stacked_filters', stacked_filter_handlers), ('level_router', level_router_handlers)]:
+        stream = io.StringIO()
+        logger = create_logger(f'benchmark.{name}', factory(stream))
+        times = timeit.repeat(lambda: run(logger, count), number=1, repeat=repeat)
+        results[name] = {'records': count, 'best_seconds': min(times), 'records_per_second': count / min(times)}
+    results['speedup'] = results['stacked_filters']['best_seconds'] / results['level_router']['best_seconds']
+    times = queued_caller_seconds(count, repeat)
+    results['queued_router_caller'] = {'records': count, 'best_seconds': min(times), 'records_per_second': count / min(times)}
+    results['queued_caller_speedup'] = results['stacked_filters']['best_seconds'] / min(times)
+    print(json.dumps(results, indent='\t'))
+
+
+if __name__ == '__main__':
+    main()
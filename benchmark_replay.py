@@ -0,0 +1,193 @@
+import argparse
+from benchmark_cycle import create_archive, create_article, create_telex2, install_reddit_stand_in, load_templates
+from datetime import datetime, timezone
+import json
+from listasdictjsonfile import ListAsDictJsonGzip
+import logging.config
+import os
+from pathlib import Path
+import platform
+from routing import ROUTE_PREFIX
+import shutil
+import tempfile
+import time
+
+SCENARIOS = ['downtime', 'reposted', 'steady']
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def full_url(article: dict) -> str:
+    date_dir = datetime.fromtimestamp(article['pubDate'], tz=timezone.utc).strftime('%Y/%m/%d')
+    return 'https://telex.hu/' + article['mainSuperTag']['slug'] + '/' + date_dir + '/' + article['slug']
+
+
+def prepare(telex2reddit, replay, templates: list, scenario: str, args, work_path: Path) -> tuple:
+    shutil.copyfile(Path(__file__).with_name('telex2reddit.ini'), work_path.joinpath('telex2reddit.ini'))
+    config_service = telex2reddit.ConfigService(work_path.joinpath('telex2reddit.ini'))
+    if not config_service.check():
+        raise Exception(f'Unable to read config: {config_service.path}')
+    config_service.set_option('telex', 'articles_per_page', str(args.per_page))
+    config_service.set_option('telex', 'collect_interval', '0')
+    for name in config_service.get():
+        if name.startswith(ROUTE_PREFIX):
+            config_service.set_option(name, 'rate_per_minute', str(args.route_rate))
+    config_service.flush()
+    config_service.check()
+    telex2reddit.config_service = config_service
+    config = config_service.get()
+    categories = config['categories']
+
+    archive = create_archive(templates, args.archive)
+    now = int(time.time())
+    backlog = []
+    if scenario != 'steady':
+        for i in range(args.backlog):
+            pub_date = now - int(args.downtime * (args.backlog - i) / args.backlog)
+            backlog.append(create_article(args.archive + i + 1, templates[i % len(templates)], pub_date))
+    for article in archive + backlog:
+        main_super_tag = article['mainSuperTag']
+        main_super_tag['name'] = categories.get(main_super_tag['slug'], main_super_tag['name'])
+
+    retention_cutoff = now - config['telex'].getint('articles_retention_days', fallback=0) * 86400
+    articles_json = ListAsDictJsonGzip(work_path.joinpath('articles.json.gz'))
+    articles_json.read_list(archive)
+    for k, v in articles_json.items():
+        if v['pubDate'] < retention_cutoff:
+            articles_json[k] = telex2reddit.compact_article(v)
+    telex2_json = create_telex2(articles_json, 0, work_path)
+    articles_json.write()
+    telex2_json.write()
+
+    telex = replay.ReplayTelex(archive[-args.per_page * 2:] + backlog, latency=args.telex_latency)
+    reddit = replay.ReplayReddit(
+        config['reddit']['username'],
+        rate_limit=replay.RateLimit(limit=args.rate_limit, window=args.rate_window),
+        latency=args.reddit_latency)
+    if scenario == 'reposted':
+        subreddit = reddit.subreddit(config['reddit']['subreddit'])
+        for article in backlog[::2]:
+            url = full_url(article)
+            subreddit.submissions[url] = replay.ReplaySubmission(
+                reddit.next_id(), subreddit.display_name, article['title'], url, article['pubDate'] + 60)
+
+    telex2reddit.content_source = telex
+    telex2reddit.reddit_factory = lambda: reddit
+    telex2reddit.reddit_instance = None
+    telex2reddit.change_log = telex2reddit.ChangeLog()
+    telex2reddit.metrics = telex2reddit.Metrics()
+    return articles_json, telex2_json, telex, reddit, len(backlog)
+
+
+def run_scenario(telex2reddit, replay, templates: list, scenario: str, args, work_path: Path) -> dict:
+    articles_json, telex2_json, telex, reddit, backlog = prepare(telex2reddit, replay, templates, scenario, args, work_path)
+    if args.workers > 0:
+        telex2reddit.persistence = telex2reddit.PersistenceExecutor(max_workers=args.workers)
+    check_interval = telex2reddit.get_config()['telex'].getint('check_interval', fallback=300)
+    max_cycles = args.cycles if scenario == 'steady' else args.max_cycles or (2 * backlog + 10)
+    cycle_seconds = []
+    idle_seconds = 0.0
+    remaining_articles = backlog
+    try:
+        while len(cycle_seconds) < max_cycles:
+            start = time.perf_counter()
+            remaining_articles = telex2reddit.run_cycle(articles_json, telex2_json)
+            cycle_seconds.append(time.perf_counter() - start)
+            if (scenario != 'steady') and (remaining_articles <= 0):
+                break
+            idle_seconds += check_interval / 5 if remaining_articles > 0 else check_interval
+        if telex2reddit.persistence is not None:
+            telex2reddit.persistence.wait()
+        targets = telex2reddit.router.targets.values()
+        deadline = time.monotonic() + args.route_wait
+        while any(target.pending for target in targets) and (time.monotonic() < deadline):
+            time.sleep(0.01)
+        routes = {target.route.subreddit: reddit.submissions(target.route.subreddit) for target in targets}
+        route_pending = sum(target.pending for target in targets)
+    finally:
+        if telex2reddit.router is not None:
+            telex2reddit.router.shutdown()
+            telex2reddit.router = None
+        if telex2reddit.persistence is not None:
+            telex2reddit.persistence.shutdown()
+            telex2reddit.persistence = None
+    metrics = telex2reddit.metrics
+    busy_seconds = sum(cycle_seconds)
+    drained = backlog - max(0, remaining_articles)
+    return {
+        'scenario': scenario,
+        'archive': args.archive,
+        'backlog': backlog,
+        'cycles': len(cycle_seconds),
+        'drained': drained,
+        'remaining_articles': remaining_articles,
+        'submitted': int(metrics.get('articles_submitted_total')),
+        'already_posted': drained - int(metrics.get('articles_submitted_total')),
+        'articles_per_second': round(drained / busy_seconds, 3) if busy_seconds else 0.0,
+        'cycle_mean': round(busy_seconds / len(cycle_seconds), 6) if cycle_seconds else 0.0,
+        'cycle_p50': round(percentile(cycle_seconds, 0.5), 6),
+        'cycle_p95': round(percentile(cycle_seconds, 0.95), 6),
+        'cycle_max': round(max(cycle_seconds, default=0.0), 6),
+        'busy_seconds': round(busy_seconds, 3),
+        'simulated_drain_seconds': round(busy_seconds + idle_seconds + reddit.rate_limit.waited, 3),
+        'rate_limit_wait': round(reddit.rate_limit.waited, 3),
+        'route_submissions': routes,
+        'route_pending': route_pending,
+        'telex_requests': telex.requests,
+        'reddit_calls': dict(sorted(reddit.calls.items()))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay telex2reddit cycles offline against local Telex and Reddit fakes')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f'comma separated: {", ".join(SCENARIOS)}')
+    parser.add_argument('--archive', type=int, default=10000, help='articles already processed before the scenario')
+    parser.add_argument('--backlog', type=int, default=500, help='unposted articles published during the downtime')
+    parser.add_argument('--downtime', type=float, default=86400, help='seconds the backlog was published over')
+    parser.add_argument('--cycles', type=int, default=20, help='cycles of the steady scenario')
+    parser.add_argument('--max-cycles', type=int, default=0, help='stop draining after this many cycles')
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--rate-limit', type=int, default=600, help='Reddit requests per rate limit window')
+    parser.add_argument('--rate-window', type=float, default=600.0)
+    parser.add_argument('--reddit-latency', type=float, default=0.0, help='seconds added to each Reddit call')
+    parser.add_argument('--telex-latency', type=float, default=0.0, help='seconds added to each Telex request')
+    parser.add_argument('--route-rate', type=float, default=0.0, help='rate_per_minute of every route (0 is unlimited)')
+    parser.add_argument('--route-wait', type=float, default=10.0, help='seconds to wait for route queues to drain')
+    parser.add_argument('--workers', type=int, default=0, help='persistence worker processes (0 writes inline)')
+    parser.add_argument('--output', default='benchmark_replay.json')
+    args = parser.parse_args()
+
+    output_path = Path(args.output).absolute()
+    logging.disable(logging.INFO)
+    install_reddit_stand_in()
+    import replay
+    import telex2reddit
+
+    templates = load_templates()
+    runs = []
+    cwd = Path.cwd()
+    for scenario in [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]:
+        if scenario not in SCENARIOS:
+            raise Exception(f'Unknown scenario: {scenario}')
+        with tempfile.TemporaryDirectory() as work_dir:
+            os.chdir(work_dir)
+            try:
+                results = run_scenario(telex2reddit, replay, templates, scenario, args, Path(work_dir))
+            finally:
+                os.chdir(cwd)
+        print(json.dumps(results))
+        runs.append(results)
+    output = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs}
+    output_path.write_text(json.dumps(output, indent='\t'), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import configparser
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+HEAVY_MODULES = ['praw', 'prawcore', 'dateutil', 'bugsnag', 'rollbar', 'raven', 'http.server', 'cProfile']
+
+
+def measure(module: str) -> tuple:
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True, cwd=Path(__file__).parent)
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.removeprefix('import time:').split('|')]
+        if (len(parts) == 3) and (parts[2] == module):
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise Exception(f'No import time for {module}')
+    loaded = [name for name in result.stdout.strip().split(',') if name]
+    return cumulative_us / 1000, loaded
+
+
+def default_threshold() -> float:
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(Path(__file__).with_name('telex2reddit.ini'), encoding='utf-8')
+    return config.getfloat('startup', 'import_time_threshold_ms', fallback=150.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import time of the bot and check it against a threshold')
+    parser.add_argument('--module', default='telex2reddit')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold-ms', type=float, default=None)
+    args = parser.parse_args()
+    threshold_ms = default_threshold() if args.threshold_ms is None else args.threshold_ms
+
+    times = []
+    loaded = []
+    for _ in range(max(1, args.repeat)):
+        import_ms, loaded = measure(args.module)
+        times.append(import_ms)
+    result = {
+        'module': args.module,
+        'best_ms': round(min(times), 3),
+        'times_ms': [round(t, 3) for t in times],
+        'threshold_ms': threshold_ms,
+        'heavy_modules_loaded': loaded}
+    print(json.dumps(result, indent='\t'))
+    if loaded:
+        print(f'Heavy modules imported at startup: {", ".join(loaded)}', file=sys.stderr)
+        sys.exit(1)
+    if min(times) > threshold_ms:
+        print(f'Import time regression: {min(times):.1f} ms > {threshold_ms:.1f} ms', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
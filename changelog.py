@@ -0,0 +1,103 @@
+import collections
+import gzip
+import json
+import logging.handlers
+from pathlib import Path
+import reprlib
+import shutil
+import threading
+import time
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, 'rb') as src, gzip.open(dest, 'wb', compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst)
+    Path(source).unlink()
+
+
+class ChangeLog:
+    def __init__(self, ring_size: int = 1000, value_limit: int = 200, log: logging.Logger = None):
+        self._handler = None
+        self._lock = threading.Lock()
+        self._log = log
+        self._pending = []
+        self._recent = collections.deque(maxlen=ring_size)
+        self._recorded = 0
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = value_limit
+        self._repr.maxother = value_limit
+        self._repr.maxdict = 8
+        self._repr.maxlist = 8
+        self._repr.maxlevel = 3
+        self._value_limit = value_limit
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def recorded(self) -> int:
+        return self._recorded
+
+    def open(self, filename: [Path, str], max_bytes: int = 10 * 1024 * 1024, backup_count: int = 10):
+        self.close()
+        path = Path(filename)
+        path.parent.mkdir(exist_ok=True, parents=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.namer = lambda name: name + '.gz'
+        handler.rotator = _gzip_rotator
+        self._handler = handler
+
+    def close(self):
+        if self._handler is not None:
+            self.flush()
+            self._handler.close()
+            self._handler = None
+
+    def record(self, path: str, operation: str, key=None, old=None, new=None):
+        event = (time.time(), path, operation, key, self._truncate(old), self._truncate(new))
+        with self._lock:
+            self._pending.append(event)
+            self._recent.append(event)
+            self._recorded += 1
+
+    def _truncate(self, value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, str) and len(value) <= self._value_limit:
+            return value
+        return self._repr.repr(value)
+
+    def _to_dict(self, event: tuple) -> dict:
+        timestamp, path, operation, key, old, new = event
+        article_id, _, json_path = path.partition('/')
+        if key is not None:
+            json_path = f'{json_path}/{key}' if json_path else str(key)
+        result = {'time': round(timestamp, 3), 'id': article_id, 'path': json_path, 'op': operation}
+        if old is not None:
+            result['old'] = old
+        if new is not None:
+            result['new'] = new
+        return result
+
+    def recent(self, count: int = None) -> list[dict]:
+        with self._lock:
+            events = list(self._recent)
+        if count is not None:
+            events = events[-count:]
+        return [self._to_dict(event) for event in events]
+
+    def flush(self) -> int:
+        with self._lock:
+            events = self._pending
+            self._pending = []
+        if not events:
+            return 0
+        if self._handler is not None:
+            for event in events:
+                line = json.dumps(self._to_dict(event), ensure_ascii=False, separators=(',', ':'))
+                self._handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO}))
+            self._handler.flush()
+        if self.log:
+            self.log.info(f'{len(events)} change(s) recorded')
+        return len(events)
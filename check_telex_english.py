@@ -5,11 +5,11 @@ import logging.config
 from pathlib import Path
 import praw
 import praw.exceptions
-import ssl
+from collectionindex import CollectionIndex
 from jsonfile import JsonGzip
+from linkcollector import feed_content
 from telexhtmlparser import TelexHTMLParser
 import urllib.error
-import urllib.request
 
 log = logging.Logger
 logging.setLoggerClass(log)
@@ -24,20 +24,6 @@ def connect_reddit(name: str, useragent: str) -> praw.Reddit:
     return reddit
 
 
-def download_content(url: str, useragent: str) -> str:
-    request = urllib.request.Request(url)
-    request.add_header('User-Agent', useragent)
-    response = urllib.request.urlopen(request, context=ssl.SSLContext())
-    data = response.read()
-    response_url = response.url
-    if response_url != url:
-        log.warning(f'URL changed from {url} to {response_url}')
-    if b'\x00' in data:
-        raise Exception(f'Content is not text: {response_url}')
-    charset = response.headers.get_content_charset()
-    return data.decode(encoding=charset, errors='replace')
-
-
 def main():
     telex_json = JsonGzip('telex.json.gz', log=log)
     telex_json.read()
@@ -51,9 +37,8 @@ def main():
     if url == '':
         raise Exception('English URL not available')
     log.info(f'download url: {url}')
-    content = download_content(url, useragent)
     html_parser = TelexHTMLParser(log)
-    html_parser.feed(content)
+    feed_content(url, useragent, html_parser, config['telex'].getint('collect_max_links', fallback=0), log=log)
     links = set(html_parser.links)
     if len(links) <= 0:
         raise Exception('No english links')
@@ -72,21 +57,19 @@ def main():
     reddit.validate_on_submit = True
     subreddit = reddit.subreddit(reddit_config['subreddit'])
     collection = subreddit.collections(reddit_config['english_collection_id'])
-    for submission in collection:
-        telex_link = submission.url.strip()
-        telex_link = telex_link.removeprefix('https://')
-        telex_link = telex_link.removeprefix('www.')
-        telex_link = telex_link.removeprefix('telex.hu')
-        telex_link = telex_link.strip('/')
-        while telex_link in links:
-            links.remove(telex_link)
+    collection_index = CollectionIndex('english_collection.json.gz', log=log)
+    collection_index.try_read()
+    collection_index.refresh(reddit, collection)
+    new_posts = {}
     for link in links:
+        if collection_index.contains(link):
+            continue
         telex_link = link.strip('/')
         if telex_link in telex_json:
             if 'reddit_url' in telex_json[telex_link]:
-                reddit_url = 'https://reddit.com' + telex_json[telex_link]['reddit_url']
-                log.info(f'Add new english post to collection: {reddit_url}')
-                collection.mod.add_post(reddit_url)
+                new_posts[telex_link] = 'https://reddit.com' + telex_json[telex_link]['reddit_url']
+    collection_index.add_posts(reddit, collection, new_posts)
+    collection_index.write(create_backup=True, check_for_changes=True)
 
     telex_json.write(create_backup=True, check_for_changes=True)
 
@@ -0,0 +1,61 @@
+from jsonfile import JsonGzip
+import praw.exceptions
+from telexhtmlparser import normalize_link
+
+
+class CollectionIndex(JsonGzip):
+    @property
+    def links(self) -> dict:
+        return self.setdefault('links', {})
+
+    def contains(self, url: str) -> bool:
+        link = normalize_link(url)
+        if link is None:
+            link = url.strip('/')
+        return link in self.links
+
+    def refresh(self, reddit, collection) -> bool:
+        last_update_utc = collection.last_update_utc
+        if self.get('last_update_utc', None) == last_update_utc:
+            return False
+        link_ids = set(collection.link_ids)
+        known_ids = {}
+        for link, fullname in self.links.items():
+            known_ids.setdefault(fullname, []).append(link)
+        for fullname, links in known_ids.items():
+            if fullname in link_ids:
+                continue
+            for link in links:
+                if self.log:
+                    self.log.info(f'Removed from collection: {link}')
+                self.links.pop(link)
+        new_ids = [fullname for fullname in link_ids if fullname not in known_ids]
+        if new_ids:
+            for submission in reddit.info(fullnames=new_ids):
+                link = normalize_link(submission.url)
+                if link is None:
+                    if self.log:
+                        self.log.warning(f'Unexpected url in collection: {submission.url}')
+                    continue
+                self.links[link] = submission.fullname
+        self['last_update_utc'] = last_update_utc
+        return True
+
+    def add_posts(self, reddit, collection, posts: dict):
+        added = 0
+        for link, reddit_url in posts.items():
+            submission = reddit.submission(url=reddit_url)
+            if self.log:
+                self.log.info(f'Add new english post to collection: {reddit_url}')
+            try:
+                collection.mod.add_post(submission)
+            except praw.exceptions.RedditAPIException as e:
+                for eitem in e.items:
+                    if self.log:
+                        self.log.error(eitem.error_message)
+                continue
+            self.links[link] = submission.fullname
+            added += 1
+        if added > 0:
+            self.pop('last_update_utc', None)
+        return added
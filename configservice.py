@@ -0,0 +1,189 @@
+from collections.abc import Mapping
+import configparser
+import logging.config
+from pathlib import Path
+import threading
+import time
+from types import MappingProxyType
+
+
+class ConfigSection(Mapping):
+    def __init__(self, name: str, values: dict):
+        self._name = name
+        self._values = MappingProxyType(dict(values))
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ConfigSection):
+            return self._values == other._values
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(sorted(self._values.items())))
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def get(self, key: str, fallback=None):
+        return self._values.get(key, fallback)
+
+    def _get_converted(self, key: str, converter, fallback):
+        value = self._values.get(key, None)
+        if value is None:
+            return fallback
+        return converter(value)
+
+    def getint(self, key: str, fallback: int = None) -> int:
+        return self._get_converted(key, int, fallback)
+
+    def getfloat(self, key: str, fallback: float = None) -> float:
+        return self._get_converted(key, float, fallback)
+
+    def getboolean(self, key: str, fallback: bool = None) -> bool:
+        def to_boolean(value: str) -> bool:
+            if value.lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+                raise ValueError(f'Not a boolean: {self.name}.{key}={value}')
+            return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+
+        return self._get_converted(key, to_boolean, fallback)
+
+
+class ConfigSnapshot(Mapping):
+    def __init__(self, sections: dict, timestamp: int = None):
+        self._sections = MappingProxyType({name: ConfigSection(name, values) for name, values in sections.items()})
+        self._timestamp = timestamp
+
+    def __getitem__(self, name: str) -> ConfigSection:
+        return self._sections[name]
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    @property
+    def timestamp(self) -> int:
+        return self._timestamp
+
+    def with_options(self, options: dict):
+        sections = {name: dict(section) for name, section in self._sections.items()}
+        for (section, option), value in options.items():
+            sections.setdefault(section, {})[option] = value
+        return ConfigSnapshot(sections, self._timestamp)
+
+    def changed_sections(self, other) -> set[str]:
+        if other is None:
+            return set(self)
+        names = set(self).union(other)
+        return {name for name in names if self._sections.get(name, None) != other.get(name, None)}
+
+
+class ConfigService:
+    def __init__(self, path: [Path, str], check_interval: float = 5.0, encoding: str = 'utf-8',
+                 log: logging.Logger = None):
+        if isinstance(path, Path):
+            self._path = path
+        else:
+            self._path = Path(path)
+        self._check_interval = check_interval
+        self._encoding = encoding
+        self._log = log
+        self._lock = threading.RLock()
+        self._next_check = 0.0
+        self._pending = {}
+        self._snapshot = None
+        self._subscribers = []
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def pending(self) -> dict:
+        return dict(self._pending)
+
+    def _parse(self) -> configparser.ConfigParser:
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read(self.path, encoding=self._encoding)
+        return parser
+
+    def _set_snapshot(self, snapshot: ConfigSnapshot):
+        if self._pending:
+            snapshot = snapshot.with_options(self._pending)
+        changed_sections = snapshot.changed_sections(self._snapshot)
+        self._snapshot = snapshot
+        if not changed_sections:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, changed_sections)
+            except:
+                if self.log:
+                    self.log.exception(f'Exception in config subscriber: {callback}')
+
+    def check(self) -> bool:
+        with self._lock:
+            self._next_check = time.monotonic() + self._check_interval
+            try:
+                if not self.path.is_file():
+                    return False
+                mtime_ns = self.path.stat().st_mtime_ns
+                if (self._snapshot is not None) and (self._snapshot.timestamp == mtime_ns):
+                    return True
+                parser = self._parse()
+                self._set_snapshot(ConfigSnapshot({name: dict(parser[name]) for name in parser.sections()}, mtime_ns))
+                return True
+            except:
+                if self.log:
+                    self.log.exception(f'Exception in check(): {self.path}')
+                return False
+
+    def get(self) -> ConfigSnapshot:
+        if time.monotonic() >= self._next_check:
+            self.check()
+        return self._snapshot
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def set_option(self, section: str, option: str, value: str):
+        with self._lock:
+            self._pending[(section, option)] = value
+            if self._snapshot is not None:
+                self._set_snapshot(self._snapshot)
+
+    def flush(self) -> bool:
+        with self._lock:
+            if not self._pending:
+                return False
+            parser = self._parse()
+            for (section, option), value in self._pending.items():
+                if not parser.has_section(section):
+                    parser.add_section(section)
+                parser.set(section, option, value)
+            with self.path.open('w', encoding=self._encoding) as ini:
+                parser.write(ini, space_around_delimiters=False)
+            if self.log:
+                self.log.debug(f'{len(self._pending)} option(s) written: {self.path}')
+            self._pending.clear()
+            self._next_check = 0.0
+            return True
@@ -1,13 +1,30 @@
 import gzip
 import json
 import logging.config
+import os
 from pathlib import Path
+import shutil
+
+
+def _same_text(text: str, chunks: list) -> bool:
+    pos = 0
+    for chunk in chunks:
+        if not text.startswith(chunk, pos):
+            return False
+        pos += len(chunk)
+    return pos == len(text)
 
 
 class JsonText(dict):
     def __str__(self):
         return json.dumps(self, ensure_ascii=False, indent='\t', sort_keys=True)
 
+    def __getstate__(self):
+        return self.__dict__.copy()
+
+    def iter_chunks(self):
+        yield str(self)
+
     def read_text(self, text: str):
         data = json.loads(text)
         self.clear()
@@ -23,6 +40,12 @@ class JsonFile(JsonText):
             self._path = Path(filename)
         self._encoding = encoding
         self._log = log
+        self._synced = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_log'] = None
+        return state
 
     @property
     def encoding(self) -> str:
@@ -40,8 +63,23 @@ class JsonFile(JsonText):
         with open(self.path, 'rt', encoding=self.encoding) as f:
             return f.read()
 
+    def _stat_signature(self) -> [tuple, None]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def read(self):
+        signature = self._stat_signature()
         self.read_text(self._read())
+        self._synced = signature
+
+    def refresh(self) -> bool:
+        if (self._synced is not None) and (self._stat_signature() == self._synced):
+            return False
+        self.read()
+        return True
 
     def try_read(self) -> bool:
         try:
@@ -56,9 +94,12 @@ class JsonFile(JsonText):
                 self.log.exception(f'Unable to read: {self.path}')
         return False
 
-    def _write(self, text: str):
-        with open(self.path, 'wt', encoding=self.encoding, newline='\n') as f:
-            f.write(text)
+    def _write(self, chunks: list, path: Path = None):
+        with open(path or self.path, 'wt', encoding=self.encoding, newline='\n') as f:
+            f.writelines(chunks)
+
+    def files_to_write(self) -> list:
+        return [self]
 
     def try_write(self, create_backup: bool = False, check_for_changes: bool = False) -> bool:
         try:
@@ -70,27 +111,37 @@ class JsonFile(JsonText):
         return False
 
     def write(self, create_backup: bool = False, check_for_changes: bool = False):
-        text = str(self)
-        if (create_backup or check_for_changes) and self.path.is_file():
-            if check_for_changes:
-                try:
-                    old = self._read()
-                    if old == text:
-                        if self.log:
-                            self.log.debug(f'No change: {self.path}')
-                        return
-                except:
+        chunks = list(self.iter_chunks())
+        if check_for_changes and self.path.is_file():
+            try:
+                signature = self._stat_signature()
+                old = self._read()
+                if _same_text(old, chunks):
                     if self.log:
-                        self.log.exception(f'Unable to check for changes: {self.path}')
-            if create_backup:
-                ext = self._path.suffix
-                backup_path = self.path.with_suffix('.bak' + ext)
+                        self.log.debug(f'No change: {self.path}')
+                    self._synced = signature
+                    return
+            except:
+                if self.log:
+                    self.log.exception(f'Unable to check for changes: {self.path}')
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        self._write(chunks, temp_path)
+        if create_backup and self.path.is_file():
+            ext = self._path.suffix
+            backup_path = self.path.with_suffix('.bak' + ext)
+            backup_temp_path = backup_path.with_name(backup_path.name + '.tmp')
+            try:
+                backup_temp_path.unlink(missing_ok=True)
                 try:
-                    self.path.replace(backup_path)
-                except:
-                    if self.log:
-                        self.log.exception(f'Unable to replace backup: {backup_path}')
-        self._write(text)
+                    os.link(self.path, backup_temp_path)
+                except OSError:
+                    shutil.copy2(self.path, backup_temp_path)
+                backup_temp_path.replace(backup_path)
+            except:
+                if self.log:
+                    self.log.exception(f'Unable to replace backup: {backup_path}')
+        temp_path.replace(self.path)
+        self._synced = self._stat_signature()
 
 
 class JsonGzip(JsonFile):
@@ -98,6 +149,6 @@ class JsonGzip(JsonFile):
         with gzip.open(self.path, 'rt', encoding=self.encoding) as f:
             return f.read()
 
-    def _write(self, text: str):
-        with gzip.open(self.path, 'wt', compresslevel=9, encoding=self.encoding, newline='\n') as f:
-            f.write(text)
+    def _write(self, chunks: list, path: Path = None):
+        with gzip.open(path or self.path, 'wt', compresslevel=9, encoding=self.encoding, newline='\n') as f:
+            f.writelines(chunks)
@@ -0,0 +1,22 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, name: str):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    return LazyModule(name)
@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+import json
+import logging.config
+import os
+from pathlib import Path
+import socket
+import sqlite3
+import time
+
+LEADER = 'leader'
+
+
+class LeaseTable:
+    def __init__(self, path: [Path, str], instance_id: str = None, lease_seconds: float = 900.0,
+                 log: logging.Logger = None):
+        if isinstance(path, Path):
+            self._path = path
+        else:
+            self._path = Path(path)
+        self._instance_id = instance_id or f'{socket.gethostname()}:{os.getpid()}'
+        self._lease_seconds = lease_seconds
+        self._log = log
+        self._connection = sqlite3.connect(self._path, timeout=30.0, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        with self._transaction() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)')
+            cursor.execute('CREATE TABLE IF NOT EXISTS pending (url_path TEXT PRIMARY KEY, article_date TEXT NOT NULL, '
+                           'category TEXT NOT NULL, entry TEXT NOT NULL)')
+            cursor.execute('CREATE TABLE IF NOT EXISTS posted (url_path TEXT PRIMARY KEY, owner TEXT NOT NULL, '
+                           'posted REAL NOT NULL, entry TEXT NOT NULL)')
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def instance_id(self) -> str:
+        return self._instance_id
+
+    @contextmanager
+    def _transaction(self):
+        cursor = self._connection.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            yield cursor
+            cursor.execute('COMMIT')
+        except:
+            cursor.execute('ROLLBACK')
+            raise
+        finally:
+            cursor.close()
+
+    def _acquire(self, cursor: sqlite3.Cursor, name: str) -> bool:
+        now = time.time()
+        cursor.execute(
+            'INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires '
+            'WHERE leases.owner = excluded.owner OR leases.expires <= ?',
+            (name, self.instance_id, now + self._lease_seconds, now))
+        return cursor.rowcount > 0
+
+    def acquire(self, name: str) -> bool:
+        with self._transaction() as cursor:
+            return self._acquire(cursor, name)
+
+    def release(self, name: str):
+        with self._transaction() as cursor:
+            cursor.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, self.instance_id))
+
+    def is_leader(self) -> bool:
+        acquired = self.acquire(LEADER)
+        if acquired and self.log:
+            self.log.debug(f'Leader lease held: {self.instance_id}')
+        return acquired
+
+    def publish_pending(self, pending: dict) -> int:
+        with self._transaction() as cursor:
+            cursor.execute('SELECT url_path FROM pending')
+            stale = {row[0] for row in cursor.fetchall()}.difference(pending)
+            cursor.executemany('DELETE FROM pending WHERE url_path = ?', [(url_path,) for url_path in stale])
+            cursor.executemany(
+                'INSERT INTO pending (url_path, article_date, category, entry) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (url_path) DO UPDATE SET article_date = excluded.article_date, '
+                'category = excluded.category, entry = excluded.entry',
+                [(url_path, entry.get('article_date', ''), entry.get('category', ''), json.dumps(entry, ensure_ascii=False))
+                 for url_path, entry in pending.items()])
+            cursor.execute('DELETE FROM pending WHERE url_path IN (SELECT url_path FROM posted)')
+        return len(pending)
+
+    def pending_count(self, categories: set = None) -> int:
+        cursor = self._connection.execute('SELECT category FROM pending')
+        return sum(1 for row in cursor if (not categories) or (row[0] in categories))
+
+    def claim(self, categories: set = None) -> [tuple, None]:
+        with self._transaction() as cursor:
+            cursor.execute(
+                'SELECT url_path, category, entry FROM pending p WHERE NOT EXISTS ('
+                'SELECT 1 FROM leases l WHERE l.name = \'article:\' || p.url_path AND l.owner != ? AND l.expires > ?) '
+                'ORDER BY article_date, url_path',
+                (self.instance_id, time.time()))
+            for url_path, category, entry in cursor.fetchall():
+                if categories and (category not in categories):
+                    continue
+                if self._acquire(cursor, 'article:' + url_path):
+                    return url_path, json.loads(entry)
+        return None
+
+    def mark_posted(self, url_path: str, entry: dict) -> bool:
+        with self._transaction() as cursor:
+            cursor.execute(
+                'INSERT OR IGNORE INTO posted (url_path, owner, posted, entry) VALUES (?, ?, ?, ?)',
+                (url_path, self.instance_id, time.time(), json.dumps(entry, ensure_ascii=False)))
+            inserted = cursor.rowcount > 0
+            cursor.execute('DELETE FROM pending WHERE url_path = ?', (url_path,))
+            cursor.execute('DELETE FROM leases WHERE name = ? AND owner = ?', ('article:' + url_path, self.instance_id))
+        if (not inserted) and self.log:
+            self.log.warning(f'Already marked as posted: {url_path}')
+        return inserted
+
+    def merge_posted(self, url_paths: list, merge) -> int:
+        url_paths = list(url_paths)
+        merged = 0
+        with self._transaction() as cursor:
+            for i in range(0, len(url_paths), 500):
+                chunk = url_paths[i:i + 500]
+                cursor.execute(f'SELECT url_path, entry FROM posted WHERE url_path IN ({",".join("?" * len(chunk))})', chunk)
+                rows = cursor.fetchall()
+                for url_path, entry in rows:
+                    merge(url_path, json.loads(entry))
+                cursor.executemany('DELETE FROM posted WHERE url_path = ?', [(url_path,) for url_path, entry in rows])
+                merged += len(rows)
+        return merged
+
+    def close(self):
+        try:
+            with self._transaction() as cursor:
+                cursor.execute('DELETE FROM leases WHERE owner = ?', (self.instance_id,))
+        finally:
+            self._connection.close()
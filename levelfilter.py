@@ -37,3 +37,43 @@ class ErrorLevelFilter(LevelFilter):
 class CriticalLevelFilter(LevelFilter):
     def get_filter_level(self):
         return logging.CRITICAL
+
+
+class LevelRouterHandler(logging.Handler):
+    def __init__(self, sinks: dict = None, stream=None):
+        super().__init__()
+        self._sinks = {}
+        for level, sink in (sinks or {}).items():
+            if isinstance(sink, logging.Handler):
+                handler = sink
+            else:
+                handler = logging.StreamHandler(stream)
+                handler.setFormatter(logging.Formatter(sink.get('format', None), sink.get('datefmt', None), sink.get('style', '%')))
+            handler.setLevel(level)
+            self.add_sink(handler.level, handler)
+
+    @property
+    def sinks(self) -> dict:
+        return dict(self._sinks)
+
+    def add_sink(self, level: int, handler: logging.Handler):
+        self._sinks[level] = handler
+        self.setLevel(min(self._sinks))
+
+    def handle(self, record: logging.LogRecord):
+        handler = self._sinks.get(record.levelno, None)
+        if handler is None:
+            return False
+        return handler.handle(record)
+
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
+    def flush(self):
+        for handler in self._sinks.values():
+            handler.flush()
+
+    def close(self):
+        for handler in self._sinks.values():
+            handler.close()
+        super().close()
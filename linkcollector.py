@@ -0,0 +1,88 @@
+import codecs
+import concurrent.futures
+import logging.config
+from metrics import Metrics
+import ssl
+from telexhtmlparser import TelexHTMLParser
+import urllib.request
+
+
+def feed_content(url: str, useragent: str, html_parser: TelexHTMLParser, max_links: int = 0,
+                 chunk_size: int = 64 * 1024, metrics: Metrics = None, log: logging.Logger = None):
+    request = urllib.request.Request(url)
+    request.add_header('User-Agent', useragent)
+    with urllib.request.urlopen(request, context=ssl.SSLContext()) as response:
+        if metrics is not None:
+            metrics.inc('http_requests_total')
+        response_url = response.url
+        if (response_url != url) and log:
+            log.warning(f'URL changed from {url} to {response_url}')
+        charset = response.headers.get_content_charset()
+        if charset is None:
+            charset = 'utf-8'
+        decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        while True:
+            data = response.read(chunk_size)
+            if metrics is not None:
+                metrics.inc('http_bytes_total', len(data))
+            if b'\x00' in data:
+                raise Exception(f'Content is not text: {response_url}')
+            html_parser.feed(decoder.decode(data, final=not data))
+            if not data:
+                break
+            if (max_links > 0) and (len(set(html_parser.links)) >= max_links):
+                if log:
+                    log.debug(f'Collected {max_links} links, stop reading: {response_url}')
+                break
+    html_parser.close()
+
+
+def link_slug(link: str) -> str:
+    return link.rstrip('/').rsplit('/', 1)[-1]
+
+
+class LinkCollector:
+    def __init__(self, sources: dict, useragent: str, max_workers: int = 4, max_links: int = 0,
+                 metrics: Metrics = None, log: logging.Logger = None):
+        self._sources = {name: url.strip() for name, url in sources.items() if url.strip() != ''}
+        self._useragent = useragent
+        self._max_links = max_links
+        self._metrics = metrics
+        self._log = log
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                                               thread_name_prefix='collect_links')
+        self.links: set[str] = set()
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def sources(self) -> dict:
+        return self._sources
+
+    def _collect_source(self, url: str) -> list[str]:
+        html_parser = TelexHTMLParser(self.log)
+        feed_content(url, self._useragent, html_parser, self._max_links, metrics=self._metrics, log=self.log)
+        return html_parser.links
+
+    def collect(self) -> dict[str, set[str]]:
+        self.links = set()
+        futures = {self._executor.submit(self._collect_source, url): name for name, url in self.sources.items()}
+        listings: dict[str, set[str]] = {}
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                links = future.result()
+            except:
+                if self.log:
+                    self.log.exception(f'Unable to collect links: {name} ({self.sources[name]})')
+                continue
+            for link in links:
+                link = link.strip('/')
+                self.links.add(link)
+                listings.setdefault(link, set()).add(name)
+        return listings
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,15 +1,92 @@
+import bisect
 import json
 import jsonfile
 
 
+def _restore(cls, state: dict, items: dict):
+    obj = cls.__new__(cls)
+    obj.__dict__.update(state)
+    dict.update(obj, items)
+    return obj
+
+
 class ListAsDictJsonText(jsonfile.JsonText):
+    def __init__(self, *args, **kwargs):
+        self._order = []
+        self._fragments = {}
+        super().__init__(*args, **kwargs)
+
+    def __reduce__(self):
+        return _restore, (self.__class__, self.__getstate__(), dict(self))
+
     def __str__(self):
-        json_list = []
-        for item_id in sorted(self):
-            item = self[item_id]
-            item['id'] = item_id
-            json_list.append(item)
-        return json.dumps(json_list, ensure_ascii=False, indent='\t', sort_keys=True)
+        return ''.join(self.iter_chunks())
+
+    def __setitem__(self, item_id, item):
+        if not dict.__contains__(self, item_id):
+            bisect.insort(self._order, item_id, key=int)
+        self._fragments.pop(item_id, None)
+        super().__setitem__(item_id, item)
+
+    def __delitem__(self, item_id):
+        super().__delitem__(item_id)
+        self._forget(item_id)
+
+    def _forget(self, item_id):
+        self._fragments.pop(item_id, None)
+        i = bisect.bisect_left(self._order, int(item_id), key=int)
+        if (i < len(self._order)) and (self._order[i] == item_id):
+            del self._order[i]
+        else:
+            self._order.remove(item_id)
+
+    def pop(self, item_id, *default):
+        if not dict.__contains__(self, item_id):
+            return super().pop(item_id, *default)
+        item = super().pop(item_id)
+        self._forget(item_id)
+        return item
+
+    def popitem(self):
+        item_id, item = super().popitem()
+        self._forget(item_id)
+        return item_id, item
+
+    def clear(self):
+        super().clear()
+        self._order = []
+        self._fragments = {}
+
+    def update(self, *args, **kwargs):
+        for item_id, item in dict(*args, **kwargs).items():
+            self[item_id] = item
+
+    def setdefault(self, item_id, default=None):
+        if not dict.__contains__(self, item_id):
+            self[item_id] = default
+        return dict.__getitem__(self, item_id)
+
+    def touch(self, item_id):
+        self._fragments.pop(item_id, None)
+
+    def _fragment(self, item_id) -> str:
+        fragment = self._fragments.get(item_id, None)
+        if fragment is None:
+            item = dict(dict.__getitem__(self, item_id), id=item_id)
+            fragment = json.dumps(item, ensure_ascii=False, indent='\t', sort_keys=True).replace('\n', '\n\t')
+            self._fragments[item_id] = fragment
+        return fragment
+
+    def iter_chunks(self):
+        if not self._order:
+            yield '[]'
+            return
+        separator = '[\n\t'
+        for item_id in self._order:
+            yield separator
+            yield self._fragment(item_id)
+            separator = ',\n\t'
+        yield '\n]'
 
     def read_list(self, json_list: list):
         ids = set()
@@ -27,7 +104,8 @@ class ListAsDictJsonText(jsonfile.JsonText):
         for item in json_list:
             item_copy = item.copy()
             item_id = item_copy.pop('id')
-            self[item_id] = item_copy
+            dict.__setitem__(self, item_id, item_copy)
+        self._order = sorted(dict.keys(self), key=int)
 
     def read_text(self, text: str):
         json_list = json.loads(text)
@@ -37,7 +115,11 @@ class ListAsDictJsonText(jsonfile.JsonText):
 
 
 class ListAsDictJsonFile(ListAsDictJsonText, jsonfile.JsonFile):
-    pass
+    def files_to_write(self) -> list:
+        snapshot = self.__class__(self.path, self.encoding)
+        snapshot._order = list(self._order)
+        snapshot._fragments = {item_id: self._fragment(item_id) for item_id in self._order}
+        return [snapshot]
 
 
 class ListAsDictJsonGzip(ListAsDictJsonFile, jsonfile.JsonGzip):
@@ -1,6 +1,103 @@
+import atexit
 import json
 import logging.config
+import logging.handlers
 from pathlib import Path
+import queue
+
+_queue_listeners = []
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue, policy: str = 'drop', timeout: float = 1.0):
+        super().__init__(log_queue)
+        if policy not in ['block', 'drop']:
+            raise ValueError(f'Unexpected queue policy: {policy}')
+        self.policy = policy
+        self.timeout = timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    def __init__(self, log_queue: queue.Queue, *handlers, batch_size: int = 100, respect_handler_level: bool = True):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.batch_size = max(1, batch_size)
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        log_queue = self.queue
+        has_task_done = hasattr(log_queue, 'task_done')
+        while True:
+            batch = [log_queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            last_record = None
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+                    last_record = record
+                if has_task_done:
+                    log_queue.task_done()
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except:
+                    if last_record is not None:
+                        handler.handleError(last_record)
+            if stop:
+                break
+
+
+def stop_queue_listeners():
+    for listener in _queue_listeners:
+        handler = getattr(listener, 'queue_handler', None)
+        if handler and handler.dropped:
+            root = logging.getLogger()
+            listener.queue.put(root.makeRecord(
+                root.name, logging.WARNING, __file__, 0, f'Dropped log records: {handler.dropped}', None, None))
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
+
+def install_queue_handlers(queue_size: int = 10000, policy: str = 'drop', batch_size: int = 100):
+    loggers = [logging.getLogger()]
+    loggers.extend(logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger))
+    for logger in loggers:
+        handlers = [handler for handler in logger.handlers if not isinstance(handler, logging.handlers.QueueHandler)]
+        if not handlers:
+            continue
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = BoundedQueueHandler(log_queue, policy)
+        queue_handler.setLevel(min(handler.level for handler in handlers))
+        listener = BatchingQueueListener(log_queue, *handlers, batch_size=batch_size)
+        listener.queue_handler = queue_handler
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+        listener.start()
+        if not _queue_listeners:
+            atexit.register(stop_queue_listeners)
+        _queue_listeners.append(listener)
 
 
 def create_handler_bugsnag(config: dict):
@@ -47,7 +144,9 @@ def load_handlers(handler_path: Path, logger_name: str = ''):
                         logging.getLogger(logger_name).addHandler(handler)
 
 
-def load_log_config(config_root_path: Path, handler_root_path: Path = None):
+def load_log_config(config_root_path: Path, handler_root_path: Path = None, use_queue: bool = True,
+                    queue_size: int = 10000, queue_policy: str = 'drop', queue_batch_size: int = 100):
+    stop_queue_listeners()
     if config_root_path:
         for path in config_root_path.glob('*'):
             if path.is_file():
@@ -62,3 +161,6 @@ def load_log_config(config_root_path: Path, handler_root_path: Path = None):
 
     if handler_root_path:
         load_handlers(handler_root_path, '')
+
+    if use_queue:
+        install_queue_handlers(queue_size, queue_policy, queue_batch_size)
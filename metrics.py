@@ -0,0 +1,118 @@
+import contextlib
+import logging.config
+import threading
+import time
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + '}'
+
+
+class Metrics:
+    def __init__(self, prefix: str = 'telex2reddit', log: logging.Logger = None):
+        self._prefix = prefix
+        self._log = log
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._server = None
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    def _name(self, name: str) -> str:
+        return f'{self._prefix}_{name}' if self._prefix else name
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def get(self, name: str, **labels) -> float:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.inc('phase_seconds_total', elapsed, phase=name)
+            self.set('phase_last_seconds', elapsed, phase=name)
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            metrics = [('counter', key, value) for key, value in self._counters.items()]
+            metrics.extend(('gauge', key, value) for key, value in self._gauges.items())
+        lines = []
+        described = set()
+        for metric_type, (name, labels), value in sorted(metrics, key=lambda item: item[1]):
+            full_name = self._name(name)
+            if full_name not in described:
+                described.add(full_name)
+                lines.append(f'# TYPE {full_name} {metric_type}')
+            lines.append(f'{full_name}{_format_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        phases = ', '.join(f'{dict(labels)["phase"]}={value:.2f}s'
+                           for (name, labels), value in sorted(counters.items()) if name == 'phase_seconds_total')
+        totals = {}
+        for (name, labels), value in counters.items():
+            if name != 'phase_seconds_total':
+                totals[name] = totals.get(name, 0) + value
+        counts = ', '.join(f'{name}={value:g}' for name, value in sorted(totals.items()))
+        sizes = ', '.join(f'{dict(labels)["file"]}={value:g}'
+                          for (name, labels), value in sorted(gauges.items()) if name == 'state_file_bytes')
+        return f'phases: {phases}; counters: {counts}; state files: {sizes}'
+
+    def serve(self, port: int, host: str = '127.0.0.1'):
+        if self._server is not None:
+            return
+        import http.server  # only needed when the endpoint is enabled
+
+        metrics = self
+
+        class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ['/', '/metrics']:
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        if self.log:
+            self.log.info(f'Metrics available at http://{host}:{self._server.server_port}/metrics')
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+from jsonfile import JsonGzip
+import logging.config
+from pathlib import Path
+
+
+class PartitionedJsonGzip(JsonGzip):
+    def __init__(self, directory: [Path, str], legacy_filename: [Path, str] = None, hot_days: int = 7,
+                 encoding: str = 'utf-8', log: logging.Logger = None):
+        directory = directory if isinstance(directory, Path) else Path(directory)
+        super().__init__(directory.joinpath('hot.json.gz'), encoding=encoding, log=log)
+        self._directory = directory
+        self._legacy_path = None if legacy_filename is None else Path(legacy_filename)
+        self._hot_days = hot_days
+        self._index = JsonGzip(directory.joinpath('index.json.gz'), encoding=encoding, log=log)
+        self._partitions: dict[str, JsonGzip] = {}
+        self._dirty_partitions: set[str] = set()
+        self._index_changed = False
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def index(self) -> JsonGzip:
+        return self._index
+
+    @property
+    def partitions(self) -> dict:
+        return self._partitions
+
+    @staticmethod
+    def partition_name(value: dict) -> [str, None]:
+        date_dir = value.get('date_dir', '')
+        if len(date_dir) < 7:
+            return None
+        return date_dir[0:7].replace('/', '-')
+
+    def is_hot(self, value: dict) -> bool:
+        if value.get('reddit_date', None) in [None, '']:
+            return True
+        if value.get('routes', None):
+            return True
+        article_date = value.get('article_date', '')
+        if article_date == '':
+            return True
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self._hot_days)
+        return article_date >= cutoff.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def is_cold(self, key: str) -> bool:
+        return (not dict.__contains__(self, key)) and (key in self._index)
+
+    def _partition(self, name: str) -> JsonGzip:
+        partition = self._partitions.get(name, None)
+        if partition is None:
+            partition = JsonGzip(self.directory.joinpath(f'{name}.json.gz'), encoding=self.encoding, log=self.log)
+            if partition.path.is_file():
+                partition.read()
+            self._partitions[name] = partition
+        return partition
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or (key in self._index)
+
+    def __getitem__(self, key):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        name = self._index.get(key, None)
+        if name is None:
+            raise KeyError(key)
+        return self._partition(name)[key]
+
+    def __setitem__(self, key, value):
+        name = self._index.pop(key, None)
+        if name is not None:
+            self._partition(name).pop(key, None)
+            self._dirty_partitions.add(name)
+            self._index_changed = True
+        dict.__setitem__(self, key, value)
+
+    def touch(self, key):
+        name = self._index.get(key, None)
+        if name is not None:
+            self._dirty_partitions.add(name)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def read(self):
+        self._partitions.clear()
+        self._dirty_partitions.clear()
+        self._index_changed = False
+        if self.path.is_file():
+            super().read()
+            if self._index.path.is_file():
+                self._index.read()
+            else:
+                self._index.clear()
+        elif (self._legacy_path is not None) and self._legacy_path.is_file():
+            if self.log:
+                self.log.warning(f'Migrating {self._legacy_path} to {self.directory}')
+            legacy = JsonGzip(self._legacy_path, encoding=self.encoding, log=self.log)
+            legacy.read()
+            self.clear()
+            dict.update(self, legacy)
+            self._index.clear()
+            self._index_changed = True
+        else:
+            raise FileNotFoundError(self.path)
+
+    def rebalance(self) -> int:
+        moved = 0
+        for key in [key for key, value in self.items() if not self.is_hot(value)]:
+            value = dict.__getitem__(self, key)
+            name = self.partition_name(value)
+            if name is None:
+                continue
+            self._partition(name)[key] = value
+            self._dirty_partitions.add(name)
+            self._index[key] = name
+            dict.pop(self, key)
+            moved += 1
+        if moved:
+            self._index_changed = True
+        return moved
+
+    def files_to_write(self) -> list:
+        self.directory.mkdir(exist_ok=True, parents=True)
+        moved = self.rebalance()
+        if moved and self.log:
+            self.log.debug(f'{moved} item(s) moved to cold partitions: {self.directory}')
+        files = [self._partitions[name] for name in sorted(self._dirty_partitions)]
+        self._dirty_partitions.clear()
+        self._partitions.clear()
+        if self._index_changed or not self._index.path.is_file():
+            files.append(self._index)
+            self._index_changed = False
+        hot = JsonGzip(self.path, encoding=self.encoding, log=self.log)
+        dict.update(hot, self)
+        files.append(hot)
+        return files
+
+    def write(self, create_backup: bool = False, check_for_changes: bool = False):
+        for json_file in self.files_to_write():
+            json_file.write(create_backup, check_for_changes)
+        self._synced = self._stat_signature()
@@ -0,0 +1,67 @@
+import concurrent.futures
+from jsonfile import JsonFile
+import logging.config
+import multiprocessing
+from pathlib import Path
+import pickle
+
+
+def _write_snapshot(payload: bytes, create_backup: bool, check_for_changes: bool) -> [tuple, None]:
+    json_files = pickle.loads(payload)
+    for json_file in json_files:
+        json_file.write(create_backup, check_for_changes)
+    return json_files[-1]._synced
+
+
+class PersistenceExecutor:
+    def __init__(self, max_workers: int = 2, max_in_flight: int = 4, log: logging.Logger = None):
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, max_workers), mp_context=multiprocessing.get_context('forkserver'))
+        self._max_in_flight = max(1, max_in_flight)
+        self._in_flight: dict[Path, tuple[concurrent.futures.Future, JsonFile]] = {}
+        self._log = log
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def in_flight(self) -> int:
+        self._reap()
+        return len(self._in_flight)
+
+    def _reap(self, wait_for: list = None):
+        if wait_for:
+            concurrent.futures.wait(wait_for)
+        for path, (future, owner) in list(self._in_flight.items()):
+            if not future.done():
+                continue
+            self._in_flight.pop(path)
+            exception = future.exception()
+            if exception is None:
+                owner._synced = future.result()
+            else:
+                owner._synced = None
+                if self.log:
+                    self.log.error(f'Unable to write: {path}', exc_info=exception)
+
+    def _futures(self) -> list:
+        return [future for future, owner in self._in_flight.values()]
+
+    def submit(self, json_file: JsonFile, create_backup: bool = False, check_for_changes: bool = False):
+        previous = self._in_flight.get(json_file.path, None)
+        if previous is not None:
+            self._reap([previous[0]])
+        while len(self._in_flight) >= self._max_in_flight:
+            concurrent.futures.wait(self._futures(), return_when=concurrent.futures.FIRST_COMPLETED)
+            self._reap()
+        payload = pickle.dumps(json_file.files_to_write(), protocol=pickle.HIGHEST_PROTOCOL)
+        future = self._executor.submit(_write_snapshot, payload, create_backup, check_for_changes)
+        self._in_flight[json_file.path] = (future, json_file)
+
+    def wait(self):
+        self._reap(self._futures())
+
+    def shutdown(self):
+        self.wait()
+        self._executor.shutdown()
@@ -0,0 +1,147 @@
+import collections
+from datetime import datetime
+import logging.config
+from pathlib import Path
+import signal
+import sys
+import threading
+
+
+class StackSampler:
+    def __init__(self, thread_id: int, interval: float = 0.01):
+        self._thread_id = thread_id
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack_sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def reset(self) -> collections.Counter:
+        with self._lock:
+            stacks = self._stacks
+            self._stacks = collections.Counter()
+        return stacks
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id, None)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                with self._lock:
+                    self._stacks[';'.join(reversed(stack))] += 1
+
+
+class CycleProfiler:
+    def __init__(self, output_path: [Path, str], log: logging.Logger = None):
+        if isinstance(output_path, Path):
+            self._output_path = output_path
+        else:
+            self._output_path = Path(output_path)
+        self._log = log
+        self._armed_cycles = 0
+        self._profile = None
+        self._sampler = None
+        self._signal_cycles = 1
+        self._threshold = 0.0
+        self._thread_id = threading.get_ident()
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def output_path(self) -> Path:
+        return self._output_path
+
+    def configure(self, cycles: int = 0, signal_cycles: int = 1, threshold: float = 0.0, sample_interval: float = 0.01):
+        self._signal_cycles = max(1, signal_cycles)
+        if cycles > 0:
+            self.arm(cycles)
+        self._threshold = threshold
+        if threshold > 0:
+            if self._sampler is None:
+                self._sampler = StackSampler(self._thread_id, sample_interval)
+                self._sampler.start()
+        elif self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+    def arm(self, cycles: int):
+        self._armed_cycles = max(self._armed_cycles, cycles)
+
+    def install_signal_handler(self, signal_name: str = 'SIGUSR1') -> bool:
+        signal_number = getattr(signal, signal_name, None)
+        if signal_number is None:
+            return False
+        signal.signal(signal_number, lambda signum, frame: self.arm(self._signal_cycles))
+        return True
+
+    def start_cycle(self):
+        if self._sampler is not None:
+            self._sampler.reset()
+        if self._armed_cycles > 0:
+            if self.log:
+                self.log.info(f'Profiling cycle ({self._armed_cycles} remaining)')
+            import cProfile  # only needed while a cycle is profiled
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def end_cycle(self, elapsed: float):
+        if self._profile is not None:
+            self._profile.disable()
+            self._armed_cycles -= 1
+            self._dump_profile(self._profile, elapsed)
+            self._profile = None
+        if self._sampler is not None:
+            stacks = self._sampler.reset()
+            if elapsed >= self._threshold:
+                self._dump_stacks(stacks, elapsed)
+
+    def _filename(self, kind: str, suffix: str) -> Path:
+        self.output_path.mkdir(exist_ok=True, parents=True)
+        return self.output_path.joinpath(f'{kind}-{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}{suffix}')
+
+    def _dump_profile(self, profile, elapsed: float):
+        import pstats
+
+        try:
+            path = self._filename('cycle', '.prof')
+            profile.dump_stats(path)
+            with path.with_suffix('.txt').open('w', encoding='utf-8') as f:
+                pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(50)
+            if self.log:
+                self.log.info(f'Cycle profile ({elapsed:.1f}s): {path}')
+        except:
+            if self.log:
+                self.log.exception('Unable to write cycle profile')
+
+    def _dump_stacks(self, stacks: collections.Counter, elapsed: float):
+        try:
+            path = self._filename('slow-cycle', '.txt')
+            with path.open('w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+            if self.log:
+                self.log.warning(f'Slow cycle ({elapsed:.1f}s), stack samples: {path}')
+        except:
+            if self.log:
+                self.log.exception('Unable to write stack samples')
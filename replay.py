@@ -0,0 +1,227 @@
+import json
+import logging.config
+from pathlib import Path
+import threading
+import time
+import urllib.error
+import urllib.parse
+
+
+class ReplayTelex:
+    def __init__(self, articles: list = None, pages: dict = None, latency: float = 0.0, log: logging.Logger = None):
+        self._articles = []
+        self._pages = dict(pages or {})
+        self._latency = latency
+        self._log = log
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.publish(articles or [])
+
+    @classmethod
+    def from_files(cls, patterns: list, latency: float = 0.0, log: logging.Logger = None) -> 'ReplayTelex':
+        articles = {}
+        for pattern in patterns:
+            for path in sorted(Path().glob(pattern)):
+                json_data = json.loads(path.read_text(encoding='utf-8'))
+                for item in json_data['items'] if isinstance(json_data, dict) else json_data:
+                    articles[item['id']] = item
+        return cls(list(articles.values()), latency=latency, log=log)
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def articles(self) -> list:
+        return list(self._articles)
+
+    def publish(self, articles: list):
+        with self._lock:
+            known = {article['id']: i for i, article in enumerate(self._articles)}
+            for article in articles:
+                if article['id'] in known:
+                    self._articles[known[article['id']]] = article
+                else:
+                    self._articles.append(article)
+            self._articles.sort(key=lambda item: (item.get('pubDate', 0), item['id']), reverse=True)
+
+    def __call__(self, url: str, useragent: str) -> str:
+        with self._lock:
+            self.requests += 1
+        if self._latency > 0:
+            time.sleep(self._latency)
+        if url in self._pages:
+            return self._pages[url]
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        if 'page' not in query:
+            raise urllib.error.HTTPError(url, 404, 'Not recorded', None, None)
+        per_page = int(query.get('perPage', ['25'])[0])
+        page = int(query['page'][0])
+        with self._lock:
+            items = self._articles[(page - 1) * per_page:page * per_page]
+        return json.dumps({'items': items}, ensure_ascii=False)
+
+
+class RateLimit:
+    def __init__(self, limit: int = 600, window: float = 600.0, sleep=None):
+        self._limit = limit
+        self._window = window
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._reset_at = 0.0
+        self._used = 0
+        self.waited = 0.0
+
+    @property
+    def headers(self) -> dict:
+        reset = max(0.0, self._reset_at - time.monotonic())
+        return {
+            'x-ratelimit-remaining': str(max(0, self._limit - self._used)),
+            'x-ratelimit-reset': str(int(reset)),
+            'x-ratelimit-used': str(self._used)}
+
+    def consume(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._reset_at:
+                self._reset_at = now + self._window
+                self._used = 0
+            if (self._limit > 0) and (self._used >= self._limit):
+                delay = self._reset_at - now
+                self.waited += delay
+                if self._sleep is not None:
+                    self._sleep(delay)
+                self._reset_at += self._window
+                self._used = 0
+            self._used += 1
+            return self.headers
+
+
+class ReplaySubmission:
+    def __init__(self, submission_id: str, subreddit: str, title: str, url: str, created_utc: float):
+        self.id = submission_id
+        self.subreddit = subreddit
+        self.title = title
+        self.url = url
+        self.created_utc = created_utc
+        self.permalink = f'/r/{subreddit}/comments/{submission_id}/{url.rstrip("/").rsplit("/", 1)[-1][:40]}/'
+
+
+class ReplayCollectionModeration:
+    def __init__(self, collection: 'ReplayCollection'):
+        self._collection = collection
+
+    def add_post(self, url: str):
+        self._collection.reddit.call('add_post')
+        if url in self._collection.posts:
+            raise self._collection.reddit.api_exception('POST_ALREADY_IN_COLLECTION', 'post already in collection', 'link')
+        self._collection.posts.append(url)
+
+
+class ReplayCollection:
+    def __init__(self, reddit: 'ReplayReddit', collection_id: str):
+        self.reddit = reddit
+        self.collection_id = collection_id
+        self.posts = []
+        self.mod = ReplayCollectionModeration(self)
+
+
+class ReplaySubreddit:
+    def __init__(self, reddit: 'ReplayReddit', name: str):
+        self._reddit = reddit
+        self.display_name = name
+        self.submissions: dict[str, ReplaySubmission] = {}
+        self._collections: dict[str, ReplayCollection] = {}
+
+    def search(self, query: str, sort: str = 'relevance', limit: int = None):
+        self._reddit.call('search')
+        if not query.startswith('url:'):
+            return []
+        submission = self.submissions.get(query[len('url:'):], None)
+        return [] if submission is None else [submission]
+
+    def submit(self, title: str, selftext: str = None, url: str = None, flair_id: str = None, flair_text: str = None,
+               resubmit: bool = True, send_replies: bool = True) -> ReplaySubmission:
+        self._reddit.call('submit')
+        if (url in self.submissions) and not resubmit:
+            raise self._reddit.api_exception('ALREADY_SUB', 'that link has already been submitted', 'url')
+        submission = ReplaySubmission(self._reddit.next_id(), self.display_name, title, url, time.time())
+        self.submissions[url] = submission
+        return submission
+
+    def collections(self, collection_id: str) -> ReplayCollection:
+        collection = self._collections.get(collection_id, None)
+        if collection is None:
+            collection = ReplayCollection(self._reddit, collection_id)
+            self._collections[collection_id] = collection
+        return collection
+
+
+class ReplayRedditor:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class ReplayUser:
+    def __init__(self, reddit: 'ReplayReddit'):
+        self._reddit = reddit
+
+    def me(self) -> ReplayRedditor:
+        self._reddit.call('me')
+        return ReplayRedditor(self._reddit.username)
+
+
+class ReplayReddit:
+    def __init__(self, username: str, rate_limit: RateLimit = None, latency: float = 0.0, log: logging.Logger = None):
+        self.username = username
+        self.user = ReplayUser(self)
+        self.validate_on_submit = False
+        self._rate_limit = rate_limit or RateLimit()
+        self._latency = latency
+        self._log = log
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._subreddits: dict[str, ReplaySubreddit] = {}
+        self.calls: dict[str, int] = {}
+        self.headers = {}
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def rate_limit(self) -> RateLimit:
+        return self._rate_limit
+
+    @staticmethod
+    def api_exception(error_type: str, message: str, field: str) -> Exception:
+        import praw.exceptions
+        return praw.exceptions.RedditAPIException([[error_type, message, field]])
+
+    def call(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        self.headers = self._rate_limit.consume()
+        if self._latency > 0:
+            time.sleep(self._latency)
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._next_id += 1
+            value, digits = self._next_id, ''
+            while value:
+                value, digit = divmod(value, 36)
+                digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+            return digits
+
+    def subreddit(self, name: str) -> ReplaySubreddit:
+        with self._lock:
+            subreddit = self._subreddits.get(name, None)
+            if subreddit is None:
+                subreddit = ReplaySubreddit(self, name)
+                self._subreddits[name] = subreddit
+            return subreddit
+
+    def submissions(self, name: str) -> int:
+        subreddit = self._subreddits.get(name, None)
+        return 0 if subreddit is None else len(subreddit.submissions)
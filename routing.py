@@ -0,0 +1,227 @@
+from configservice import ConfigSection, ConfigSnapshot
+import logging.config
+import queue
+import threading
+import time
+
+ROUTE_PREFIX = 'route:'
+
+
+class Route:
+    def __init__(self, name: str, section: ConfigSection):
+        self._name = name
+        self._values = dict(section)
+        self._subreddit = section['subreddit']
+        self._categories = {value.strip() for value in section.get('categories', fallback='').split(',') if value.strip()}
+        self._flags = [value.strip() for value in section.get('flags', fallback='').split(',') if value.strip()]
+        self._collection = section.get('collection', fallback='')
+        self._field = section.get('field', fallback=f'reddit_{name}_url')
+        self._rate_per_minute = section.getfloat('rate_per_minute', fallback=0.0)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Route) and (self._name == other._name) and (self._values == other._values)
+
+    def __repr__(self) -> str:
+        return f'Route({self._name!r}, {self._values!r})'
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def subreddit(self) -> str:
+        return self._subreddit
+
+    @property
+    def categories(self) -> set:
+        return self._categories
+
+    @property
+    def flags(self) -> list:
+        return self._flags
+
+    @property
+    def collection(self) -> str:
+        return self._collection
+
+    @property
+    def field(self) -> str:
+        return self._field
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self._rate_per_minute
+
+    def matches(self, entry: dict) -> bool:
+        if self._categories and (entry.get('category', '') not in self._categories):
+            return False
+        for flag in self._flags:
+            if not entry.get(flag, False):
+                return False
+        return True
+
+
+def load_routes(config: ConfigSnapshot) -> list[Route]:
+    routes = []
+    for name, section in config.items():
+        if name.startswith(ROUTE_PREFIX):
+            routes.append(Route(name[len(ROUTE_PREFIX):], section))
+    if routes:
+        return routes
+    reddit_config = config.get('reddit', ConfigSection('reddit', {}))
+    if reddit_config.get('subreddit_english', fallback='') == '':
+        return []
+    return [Route('english', ConfigSection('route:english', {
+        'collection': reddit_config.get('english_collection_id', fallback=''),
+        'field': 'reddit_english_url',
+        'flags': 'english',
+        'subreddit': reddit_config['subreddit_english']}))]
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self._rate = rate_per_minute / 60.0
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+
+    def acquire(self, stop: threading.Event = None) -> bool:
+        if self._rate <= 0:
+            return True
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            delay = (1 - self._tokens) / self._rate
+            if stop is None:
+                time.sleep(delay)
+            elif stop.wait(delay):
+                return False
+
+
+class RouteTarget:
+    def __init__(self, route: Route, post, reddit_factory, results: queue.Queue, log: logging.Logger = None):
+        self._route = route
+        self._post = post
+        self._reddit_factory = reddit_factory
+        self._results = results
+        self._log = log
+        self._bucket = TokenBucket(route.rate_per_minute)
+        self._queue = queue.Queue()
+        self._queued: set[str] = set()
+        self._posted: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'route:{route.name}', daemon=True)
+        self._thread.start()
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def route(self) -> Route:
+        return self._route
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queued)
+
+    def enqueue(self, url_path: str, task: dict) -> bool:
+        with self._lock:
+            if (url_path in self._queued) or (url_path in self._posted):
+                return False
+            self._queued.add(url_path)
+        self._queue.put((url_path, task))
+        return True
+
+    def _run(self):
+        reddit = None
+        while not self._stop.is_set():
+            try:
+                url_path, task = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            permalink = None
+            try:
+                if not self._bucket.acquire(self._stop):
+                    break
+                if reddit is None:
+                    reddit = self._reddit_factory()
+                permalink = self._post(reddit, self._route, task)
+            except:
+                if self.log:
+                    self.log.exception(f'Unable to post to {self._route.subreddit}: {url_path}')
+            with self._lock:
+                self._queued.discard(url_path)
+                self._posted.add(url_path)
+            self._results.put((self._route.name, self._route.field, url_path, permalink))
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: float = None):
+        self._thread.join(timeout)
+
+
+class Router:
+    def __init__(self, post, reddit_factory, log: logging.Logger = None):
+        self._post = post
+        self._reddit_factory = reddit_factory
+        self._log = log
+        self._results = queue.Queue()
+        self._targets: dict[str, RouteTarget] = {}
+
+    @property
+    def log(self) -> logging.Logger:
+        return self._log
+
+    @property
+    def routes(self) -> list[Route]:
+        return [target.route for target in self._targets.values()]
+
+    @property
+    def targets(self) -> dict:
+        return dict(self._targets)
+
+    def configure(self, routes: list[Route]):
+        names = {route.name for route in routes}
+        for name in [name for name in self._targets if name not in names]:
+            self._targets.pop(name).stop()
+        for route in routes:
+            target = self._targets.get(route.name, None)
+            if (target is not None) and (target.route == route):
+                continue
+            if target is not None:
+                target.stop()
+            if self.log:
+                self.log.debug(f'Route {route.name}: {route.subreddit}')
+            self._targets[route.name] = RouteTarget(route, self._post, self._reddit_factory, self._results, log=self.log)
+
+    def enqueue(self, url_path: str, names: list, task: dict) -> int:
+        enqueued = 0
+        for name in names:
+            target = self._targets.get(name, None)
+            if (target is not None) and target.enqueue(url_path, task):
+                enqueued += 1
+        return enqueued
+
+    def results(self) -> list[tuple]:
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def shutdown(self, timeout: float = 5.0):
+        targets = list(self._targets.values())
+        self._targets.clear()
+        for target in targets:
+            target.stop()
+        for target in targets:
+            target.join(timeout)
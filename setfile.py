@@ -1,4 +1,6 @@
 import gzip
+import hashlib
+import heapq
 import logging.config
 from pathlib import Path
 
@@ -28,6 +30,9 @@ class SetReadFile(set):
     def __str__(self):
         return '\n'.join(self.as_sorted_list())
 
+    def _open_for_read(self, path: Path):
+        return open(path, 'rt', encoding=self.encoding)
+
     def _read(self, filehandle, keepends: bool = False):
         self.clear()
         for line in filehandle:
@@ -42,7 +47,7 @@ class SetReadFile(set):
         return strings
 
     def read(self):
-        with open(self.path, 'rt', encoding=self.encoding) as f:
+        with self._open_for_read(self.path) as f:
             self._read(f)
 
     def read_text(self, text: str):
@@ -63,6 +68,145 @@ class SetReadFile(set):
 
 
 class SetFile(SetReadFile):
+    def __init__(self, filename: [Path, str], encoding: str = 'utf-8', log: logging.Logger = None,
+                 chunk_lines: int = 4096):
+        super().__init__(filename, encoding, log)
+        self._added = set()
+        self._removed = set()
+        self._sorted = []
+        self._digest = None
+        self._chunk_lines = chunk_lines
+
+    def _invalidate(self):
+        self._added.clear()
+        self._removed.clear()
+        self._sorted = None
+
+    def add(self, item):
+        if item in self:
+            return
+        super().add(item)
+        if self._sorted is None:
+            return
+        if item in self._removed:
+            self._removed.discard(item)
+        else:
+            self._added.add(item)
+
+    def discard(self, item):
+        if item not in self:
+            return
+        super().discard(item)
+        if self._sorted is None:
+            return
+        if item in self._added:
+            self._added.discard(item)
+        else:
+            self._removed.add(item)
+
+    def remove(self, item):
+        if item not in self:
+            raise KeyError(item)
+        self.discard(item)
+
+    def pop(self):
+        item = super().pop()
+        if self._sorted is not None:
+            if item in self._added:
+                self._added.discard(item)
+            else:
+                self._removed.add(item)
+        return item
+
+    def clear(self):
+        super().clear()
+        self._added.clear()
+        self._removed.clear()
+        self._sorted = []
+
+    def update(self, *others):
+        for other in others:
+            for item in other:
+                self.add(item)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def difference_update(self, *others):
+        for other in others:
+            for item in other:
+                self.discard(item)
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def intersection_update(self, *others):
+        super().intersection_update(*others)
+        self._invalidate()
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def symmetric_difference_update(self, other):
+        super().symmetric_difference_update(other)
+        self._invalidate()
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+    def as_sorted_list(self) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(set.__iter__(self))
+        elif self._added or self._removed:
+            removed = self._removed
+            kept = (item for item in self._sorted if item not in removed) if removed else self._sorted
+            self._sorted = list(heapq.merge(kept, sorted(self._added)))
+        self._added.clear()
+        self._removed.clear()
+        return self._sorted
+
+    def _read(self, filehandle, keepends: bool = False):
+        digest = hashlib.sha256()
+        lines = []
+        for line in filehandle:
+            digest.update(line.encode(self.encoding))
+            lines.append(line if keepends else line.rstrip('\n\r'))
+        set.clear(self)
+        set.update(self, lines)
+        self._added.clear()
+        self._removed.clear()
+        if (len(lines) == len(self)) and all(lines[i] < lines[i + 1] for i in range(len(lines) - 1)):
+            self._sorted = lines
+        else:
+            self._sorted = None
+        self._digest = digest.hexdigest()
+
+    def read_text(self, text: str):
+        super().read_text(text)
+        self._digest = None
+
+    def _chunks(self, strings: list[str]):
+        for start in range(0, len(strings), self._chunk_lines):
+            chunk = '\n'.join(strings[start:start + self._chunk_lines])
+            yield chunk if start == 0 else '\n' + chunk
+
+    def _text_digest(self, strings: list[str]) -> str:
+        digest = hashlib.sha256()
+        for chunk in self._chunks(strings):
+            digest.update(chunk.encode(self.encoding))
+        return digest.hexdigest()
+
+    def _file_digest(self) -> str:
+        digest = hashlib.sha256()
+        with self._open_for_read(self.path) as f:
+            for line in f:
+                digest.update(line.encode(self.encoding))
+        return digest.hexdigest()
+
     def try_write(self, create_backup: bool = False, check_for_changes: bool = False) -> bool:
         try:
             self.write(create_backup, check_for_changes)
@@ -73,39 +217,40 @@ class SetFile(SetReadFile):
         return False
 
     def write(self, create_backup: bool = False, check_for_changes: bool = False):
-        text = str(self)
-        if (create_backup or check_for_changes) and self.path.is_file():
-            if check_for_changes:
-                try:
-                    old = SetReadFile(self.path, self.encoding, self.log)
-                    old.read()
-                    if str(old) == text:
-                        if self.log:
-                            self.log.info(f'No change: {self.path}')
-                        return
-                except:
-                    if self.log:
-                        self.log.exception(f'Unable to check for changes: {self.path}')
-            if create_backup:
-                ext = self.path.suffix
-                backup_path = self.path.with_suffix('.bak' + ext)
-                try:
-                    self.path.replace(backup_path)
-                except:
+        strings = self.as_sorted_list()
+        digest = self._text_digest(strings)
+        if check_for_changes and self.path.is_file():
+            try:
+                old_digest = self._digest if self._digest is not None else self._file_digest()
+                if old_digest == digest:
                     if self.log:
-                        self.log.exception(f'Unable to replace backup: {backup_path}')
-        self._write(text)
+                        self.log.info(f'No change: {self.path}')
+                    return
+            except:
+                if self.log:
+                    self.log.exception(f'Unable to check for changes: {self.path}')
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with self._open_for_write(temp_path) as f:
+            for chunk in self._chunks(strings):
+                f.write(chunk)
+        if create_backup and self.path.is_file():
+            ext = self.path.suffix
+            backup_path = self.path.with_suffix('.bak' + ext)
+            try:
+                self.path.replace(backup_path)
+            except:
+                if self.log:
+                    self.log.exception(f'Unable to replace backup: {backup_path}')
+        temp_path.replace(self.path)
+        self._digest = digest
 
-    def _write(self, text: str):
-        with open(self.path, 'wt', encoding=self.encoding, newline='\n') as f:
-            f.write(text)
+    def _open_for_write(self, path: Path):
+        return open(path, 'wt', encoding=self.encoding, newline='\n')
 
 
 class SetGzip(SetFile):
-    def read(self):
-        with gzip.open(self.path, 'rt', encoding=self.encoding) as f:
-            self._read(f)
+    def _open_for_read(self, path: Path):
+        return gzip.open(path, 'rt', encoding=self.encoding)
 
-    def _write(self, text: str):
-        with gzip.open(self.path, 'wt', compresslevel=9, encoding=self.encoding, newline='\n') as f:
-            f.write(text)
+    def _open_for_write(self, path: Path):
+        return gzip.open(path, 'wt', compresslevel=9, encoding=self.encoding, newline='\n')
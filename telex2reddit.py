@@ -1,72 +1,89 @@
-import configparser
+from changelog import ChangeLog
+from configservice import ConfigSection, ConfigService, ConfigSnapshot
 from datetime import datetime
+import gzip
 import json
-from jsonfile import JsonGzip
+from leases import LeaseTable
+from linkcollector import LinkCollector, link_slug
 from listasdictjsonfile import ListAsDictJsonGzip, ListAsDictJsonText
 import log_config
 import logging.config
+from metrics import Metrics
+from partitionedjsonfile import PartitionedJsonGzip
 from pathlib import Path
-import praw
-import praw.exceptions
-import prawcore.exceptions
+from persistence import PersistenceExecutor
+from lazyimport import lazy_import
+from profiler import CycleProfiler
 import re
+from routing import Route, Router, load_routes
 import ssl
+import threading
 import time
 import urllib.error
 import urllib.request
 
 log = logging.getLogger()
+praw = lazy_import('praw')
+prawcore = lazy_import('prawcore')
+category_check_error: BaseException = None
+change_log = ChangeLog(log=log)
+config_service: ConfigService = None
+content_source = None
+leases: LeaseTable = None
+link_collector: LinkCollector = None
+metrics = Metrics(log=log)
+next_collect_time = 0
+persistence: PersistenceExecutor = None
+profiler: CycleProfiler = None
+reddit_factory = None
+reddit_instance = None
+router: Router = None
+
+
+def get_config() -> ConfigSnapshot:
+    return config_service.get()
+
+
+def on_config_changed(snapshot: ConfigSnapshot, changed_sections: set):
+    global reddit_instance
+    if 'reddit' in changed_sections:
+        reddit_instance = None
+    if ('profile' in changed_sections) and (profiler is not None):
+        configure_profiler(snapshot)
+
+
+def configure_profiler(snapshot: ConfigSnapshot):
+    profile_config = snapshot.get('profile', ConfigSection('profile', {}))
+    profiler.configure(
+        cycles=profile_config.getint('cycles', fallback=0),
+        signal_cycles=profile_config.getint('signal_cycles', fallback=1),
+        threshold=profile_config.getfloat('threshold', fallback=0.0),
+        sample_interval=profile_config.getfloat('sample_interval', fallback=0.01))
 
 
-def check_config() -> bool:
-    global config
-    global config_path
-    global config_timestamp
-    try:
-        if not config_path.is_file():
-            return False
-        mtime_ns = config_path.stat().st_mtime_ns
-        if config and config_timestamp:
-            if mtime_ns == config_timestamp:
-                return True
-        config_timestamp = mtime_ns
-        config = configparser.ConfigParser(interpolation=None)
-        config.read(config_path, encoding='utf-8')
-        return True
-    except:
-        log.exception('Exception in check_config()')
-        return False
-
-
-def get_config() -> configparser.ConfigParser:
-    global config
-    check_config()
-    # noinspection PyTypeChecker
-    return config
-
-
-# noinspection PyUnresolvedReferences
 def ensure_category(category: str, category_name: str):
-    global config_path
     # noinspection PyShadowingNames
     config = get_config()
     if category not in config['categories']:
         log.warning(f'New category: {category} ({category_name})')
-        try:
-            config.set('categories', category, category_name)
-            with config_path.open('w', encoding='utf-8') as ini:
-                config.write(ini, space_around_delimiters=False)
-        except:
-            log.exception(f'Unable to add new category: {category} ({category_name}): {config_path}')
+        config_service.set_option('categories', category, category_name)
+        config = get_config()
     if category_name != config['categories'].get(category, ''):
         log.warning(f'Unexpected category name: {category} ({category_name})')
 
 
 def download_content(url: str, useragent: str, default_encoding: str = 'utf-8') -> str:
+    if content_source is not None:
+        content = content_source(url, useragent)
+        metrics.inc('http_requests_total')
+        metrics.inc('http_bytes_total', len(content))
+        return content
     request = urllib.request.Request(url)
     request.add_header('User-Agent', useragent)
     response = urllib.request.urlopen(request, context=ssl.SSLContext())
     data = response.read()
+    metrics.inc('http_requests_total')
+    metrics.inc('http_bytes_total', len(data))
     response_url = response.url
     if response_url != url:
         log.warning(f'URL changed from {url} to {response_url}')
@@ -82,16 +99,19 @@ def datetime2iso8601(value: datetime) -> str:
     return value.isoformat(timespec='minutes' if value.second == 0 else 'seconds')
 
 
-def connect_reddit(name: str, useragent: str) -> praw.Reddit:
+def connect_reddit(name: str, useragent: str) -> 'praw.Reddit':
     reddit = praw.Reddit(name, user_agent=useragent)
     redditor = reddit.user.me()
+    metrics.inc('reddit_api_calls_total', call='me')
     assert redditor is not None
     username = redditor.name
     assert username == name
     return reddit
 
 
-def get_reddit() -> praw.Reddit:
+def create_reddit() -> 'praw.Reddit':
+    if reddit_factory is not None:
+        return reddit_factory()
     # noinspection PyShadowingNames
     config = get_config()
     reddit = connect_reddit(config['reddit']['username'], 'Script by u/' + config['reddit']['script_author'])
@@ -99,6 +119,13 @@ def get_reddit() -> praw.Reddit:
     return reddit
 
 
+def get_reddit() -> 'praw.Reddit':
+    global reddit_instance
+    if reddit_instance is None:
+        reddit_instance = create_reddit()
+    return reddit_instance
+
+
 def same_objects(a, b):
     return str(a) == str(b)
 
@@ -113,12 +140,12 @@ def update_list(path: str, src: list, dest: list):
                 only_append = False
                 break
         else:
-            log.info(f'{path} appended {i}.: {src[i]}')
+            change_log.record(path, 'appended', i, new=src[i])
             dest.append(src[i])
     if only_append:
         i = len(dest) - 1
         while i >= len(src):
-            log.info(f'{path} deleted {i}.: {dest[i]}')
+            change_log.record(path, 'deleted', i, old=dest[i])
             dest.pop(i)
             i -= 1
         return
@@ -148,13 +175,13 @@ def update_list(path: str, src: list, dest: list):
                     update_item(f'{path}/{i}', v, dest[i])
                     break
         else:
-            log.info(f'{path} appended: {v}')
+            change_log.record(path, 'appended', new=v)
             dest.append(v)
     for k, v in dest_dict.items():
         if k not in src_dict:
             for i in range(len(dest)):
                 if dest[i][key_name] == k:
-                    log.info(f'{path} deleted {i}.: {dest[i]}')
+                    change_log.record(path, 'deleted', i, old=dest[i])
                     dest.pop(i)
                     break
 
@@ -169,10 +196,10 @@ def update_item(path: str, src: dict, dest: dict):
                 if isinstance(dest[k], list) and isinstance(v, list):
                     update_list(f'{path}/{k}', v, dest[k])
                     continue
-                log.info(f'{path} changed {k}: from {dest[k]} to {v}')
+                change_log.record(path, 'changed', k, dest[k], v)
                 dest[k] = v
         else:
-            log.info(f'{path} added {k}: {v}')
+            change_log.record(path, 'added', k, new=v)
             dest[k] = v
     delete_ids = set()
     for k in dest:
@@ -181,16 +208,125 @@ def update_item(path: str, src: dict, dest: dict):
         if k not in src:
             delete_ids.add(k)
     for k in delete_ids:
-        log.info(f'{path} deleted {k}: {dest[k]}')
+        change_log.record(path, 'deleted', k, old=dest[k])
         dest.pop(k)
 
 
-def check_categories():
+COMPACT_FIELDS = ['active', 'english', 'pubDate', 'slug', 'title', 'type']
+COMPACT_MAIN_SUPER_TAG_FIELDS = ['name', 'slug']
+
+
+def compact_article(article: dict) -> dict:
+    compact = {k: article[k] for k in COMPACT_FIELDS if k in article}
+    main_super_tag = article.get('mainSuperTag', None)
+    if isinstance(main_super_tag, dict):
+        compact['mainSuperTag'] = {k: main_super_tag[k] for k in COMPACT_MAIN_SUPER_TAG_FIELDS if k in main_super_tag}
+    return compact
+
+
+def is_compact(article: dict) -> bool:
+    for k, v in article.items():
+        if k == 'mainSuperTag':
+            if isinstance(v, dict) and all(tag_key in COMPACT_MAIN_SUPER_TAG_FIELDS for tag_key in v):
+                continue
+            return False
+        if k not in COMPACT_FIELDS:
+            return False
+    return True
+
+
+def compact_articles(articles_json: ListAsDictJsonText, retention_days: int, archive_path: Path = None) -> int:
+    cutoff = time.time() - retention_days * 86400
+    archived = []
+    for k, v in articles_json.items():
+        if v.get('pubDate', cutoff) >= cutoff:
+            continue
+        if is_compact(v):
+            continue
+        archived.append(dict(v, id=k))
+        articles_json[k] = compact_article(v)
+    if archived and archive_path:
+        with gzip.open(archive_path, 'at', compresslevel=9, encoding='utf-8', newline='\n') as archive:
+            for article in archived:
+                archive.write(json.dumps(article, ensure_ascii=False, sort_keys=True) + '\n')
+    if archived:
+        log.info(f'{len(archived)} article(s) compacted')
+    return len(archived)
+
+
+def tag_listings(telex2_json: PartitionedJsonGzip, listings: dict):
+    for link, names in listings.items():
+        url_path = link_slug(link)
+        if url_path not in telex2_json:
+            continue
+        old_names = telex2_json[url_path].get('listings', [])
+        new_names = sorted(names.union(old_names))
+        if new_names != old_names:
+            telex2_json[url_path]['listings'] = new_names
+            telex2_json.touch(url_path)
+
+
+def project_articles(articles_json: ListAsDictJsonText, telex2_json: PartitionedJsonGzip, telex_config: ConfigSection,
+                     changed_ids: set = None):
+    expected_types = telex_config.get('expected_types', '').split(',')
+    ignore_types = telex_config.get('ignore_types', '').split(',')
+    for k, v in articles_json.items():
+        if (changed_ids is not None) and (k not in changed_ids) and telex2_json.is_cold(v['slug']):
+            continue
+        item_type = v['type']
+        if item_type in ignore_types:
+            continue
+        if item_type not in expected_types:
+            log.warning(f'Unexpected type ({item_type}): {k}')
+        if not v['active']:
+            log.warning(f'not active: {k}')
+            continue
+        article_date = datetime.utcfromtimestamp(v['pubDate'])
+        url_path = v['slug']
+        if not re.fullmatch(r'[\w-]+', url_path):
+            log.error(url_path)
+        if url_path not in telex2_json:
+            log.info(f'New article: {url_path}')
+            telex2_json[url_path] = {}
+        updates = {
+            'article_date': datetime2iso8601(article_date) + 'Z',
+            'article_title': v['title'],
+            'category': v['mainSuperTag']['slug'],
+            'date_dir': article_date.strftime('%Y/%m/%d')}
+        if v['english']:
+            updates['english'] = True
+        entry = telex2_json[url_path]
+        if any(entry.get(key, None) != value for key, value in updates.items()):
+            entry.update(updates)
+            telex2_json.touch(url_path)
+
+
+def find_oldest_article(telex2_json: PartitionedJsonGzip) -> tuple:
+    oldest_url = None
+    remaining_articles = 0
+    for k, v in telex2_json.items():
+        if 'parse_date' in v:
+            v.pop('parse_date')
+        if v.get('reddit_date', None) not in [None, '']:
+            continue
+        article_date = v.get('article_date', None)
+        if article_date in [None, '']:
+            log.warning('No article_date: ' + str(v))
+            continue
+        remaining_articles += 1
+        if (oldest_url is None) or (article_date < telex2_json[oldest_url]['article_date']):
+            oldest_url = k
+    return oldest_url, remaining_articles
+
+
+def check_categories(reddit: 'praw.Reddit' = None):
     # noinspection PyShadowingNames
     config = get_config()
     categories = config['categories']
     flair_classes = {}
-    subreddit = get_reddit().subreddit(config['reddit']['subreddit'])
+    if reddit is None:
+        reddit = get_reddit()
+    subreddit = reddit.subreddit(config['reddit']['subreddit'])
     for flair in subreddit.flair.link_templates:
         if flair['type'] != 'text':
             continue
@@ -243,196 +379,360 @@ def check_categories():
         automod_path.write_text(automoderator_content_md, encoding='utf-8')
 
 
-def main():
-    check_categories()
+def article_url(url_path: str, article: dict) -> str:
+    return 'https://telex.hu/' + article['category'] + '/' + article['date_dir'] + '/' + url_path
 
+
+def submit_route(reddit: 'praw.Reddit', route: Route, task: dict) -> [str, None]:
+    if route.collection != '':
+        collection = reddit.subreddit(task['subreddit']).collections(route.collection)
+        reddit_url = 'https://reddit.com' + task['permalink']
+        log.info(f'Add new {route.name} post to collection: {reddit_url}')
+        metrics.inc('reddit_api_calls_total', call='add_post')
+        try:
+            collection.mod.add_post(reddit_url)
+        except praw.exceptions.RedditAPIException as e:
+            for eitem in e.items:
+                log.error(eitem.error_message)
+    full_url = task['full_url']
+    log.info(f'Submit to {route.subreddit}: {full_url}')
+    subreddit = reddit.subreddit(route.subreddit)
+    submission = None
+    metrics.inc('reddit_api_calls_total', call='search')
+    for old_submission in subreddit.search('url:' + full_url, sort='new', limit=1):
+        submission = old_submission
+        log.info(f'Submission already posted: {submission.permalink}')
+    if submission is None:
+        metrics.inc('reddit_api_calls_total', call='submit')
+        try:
+            submission = subreddit.submit(
+                title=task['title'],
+                selftext=None,
+                url=full_url,
+                flair_id=None,
+                flair_text=None,
+                resubmit=False,
+                send_replies=False)
+            metrics.inc('route_submitted_total', route=route.name)
+        except praw.exceptions.RedditAPIException as e:
+            for eitem in e.items:
+                if eitem.error_type != 'ALREADY_SUB':
+                    raise
+                if eitem.field != 'url':
+                    raise
+                log.warning(eitem.error_message)
+    return None if submission is None else submission.permalink
+
+
+def apply_route_results(telex2_json: PartitionedJsonGzip):
+    for name, field, url_path, permalink in router.results():
+        if url_path not in telex2_json:
+            continue
+        entry = telex2_json[url_path]
+        if permalink:
+            entry[field] = permalink
+        routes = [route for route in entry.get('routes', []) if route != name]
+        if routes:
+            entry['routes'] = routes
+        else:
+            entry.pop('routes', None)
+        telex2_json.touch(url_path)
+
+
+def enqueue_routes(telex2_json: PartitionedJsonGzip) -> int:
+    subreddit = get_config()['reddit']['subreddit']
+    configured = {route.name for route in router.routes}
+    enqueued = 0
+    for k, v in telex2_json.items():
+        if 'routes' not in v:
+            continue
+        routes = [route for route in v['routes'] if route in configured]
+        if not routes:
+            v.pop('routes')
+            continue
+        v['routes'] = routes
+        task = {
+            'full_url': article_url(k, v),
+            'permalink': v.get('reddit_url', ''),
+            'subreddit': subreddit,
+            'title': v.get('article_title', '').strip()}
+        enqueued += router.enqueue(k, routes, task)
+    return enqueued
+
+
+def submit_article(url_path: str, article: dict) -> bool:
+    # noinspection PyShadowingNames
+    config = get_config()
+    article_title = article.get('article_title', '').strip()
+    if article_title == '':
+        raise Exception(f'No article_title: {url_path}')
+    full_url = article_url(url_path, article)
+    log.info(f'Submit: {full_url}')
+    reddit = get_reddit()
+    subreddit = reddit.subreddit(config['reddit']['subreddit'])
+    utc_time_str = ''
+    submission = None
+    submission_already_posted = False
+    metrics.inc('reddit_api_calls_total', call='search')
+    for old_submission in subreddit.search('url:' + full_url, sort='new', limit=1):
+        submission_already_posted = True
+        submission = old_submission
+        log.info(f'Submission already posted: {submission.permalink}')
+    if submission is None:
+        metrics.inc('reddit_api_calls_total', call='submit')
+        try:
+            submission = subreddit.submit(
+                title=article_title,
+                selftext=None,
+                url=full_url,
+                flair_id=None,
+                flair_text=None,
+                resubmit=False,
+                send_replies=False)
+        except praw.exceptions.RedditAPIException as e:
+            for eitem in e.items:
+                if eitem.error_type != 'ALREADY_SUB':
+                    raise
+                if eitem.field != 'url':
+                    raise
+                log.warning(eitem.error_message)
+                submission_already_posted = True
+                utc_time_str = datetime2iso8601(datetime.now())
+    if (not submission_already_posted) and submission:
+        metrics.inc('articles_submitted_total')
+    if submission:
+        utc_time_str = datetime2iso8601(datetime.fromtimestamp(submission.created_utc)) + 'Z'
+    article['reddit_date'] = utc_time_str
+    article['reddit_url'] = '' if submission is None else submission.permalink
+    if submission:
+        routes = [route.name for route in load_routes(config) if route.matches(article)]
+        if routes:
+            article['routes'] = routes
+            if 'telex' in article_title.lower():
+                log.warning(f'Telex in title (internal post?): {article_title}')
+    return submission_already_posted
+
+
+def cluster_categories() -> set:
+    cluster_config = get_config().get('cluster', ConfigSection('cluster', {}))
+    return {category.strip() for category in cluster_config.get('categories', fallback='').split(',') if category.strip()}
+
+
+def sync_pending(telex2_json: PartitionedJsonGzip) -> int:
+    pending = {}
+    for k, v in telex2_json.items():
+        if v.get('reddit_date', None) not in [None, '']:
+            continue
+        if v.get('article_date', None) in [None, '']:
+            continue
+        pending[k] = v
+    def merge(url_path: str, entry: dict):
+        telex2_json[url_path].update(entry)
+        pending.pop(url_path)
+
+    leases.merge_posted(list(pending), merge)
+    return leases.publish_pending(pending)
+
+
+def submit_claimed(categories: set) -> int:
+    submissions_already_posted = 0
+    while submissions_already_posted < 25:
+        claimed = leases.claim(categories)
+        if claimed is None:
+            break
+        url_path, article = claimed
+        article.pop('reddit_date', None)
+        try:
+            submission_already_posted = submit_article(url_path, article)
+        finally:
+            if 'reddit_date' in article:
+                leases.mark_posted(url_path, article)
+        if not submission_already_posted:
+            break
+        submissions_already_posted += 1
+    return leases.pending_count(categories)
+
+
+def run_cycle(articles_json: ListAsDictJsonGzip, telex2_json: PartitionedJsonGzip) -> int:
+    global link_collector
+    global next_collect_time
+    global router
+    if (leases is not None) and not leases.is_leader():
+        with metrics.phase('submit'):
+            return submit_claimed(cluster_categories())
     remaining_articles = 0
-    articles_json = ListAsDictJsonGzip('articles.json.gz', log=log)
-    telex2_json = JsonGzip('telex2.json.gz', log=log)
-    while True:
+    with metrics.phase('read'):
+        if persistence is not None:
+            persistence.wait()
+        articles_json.refresh()
+        for k, v in articles_json.items():
+            if ('contentType' in v) and (v['contentType'] != 'article'):
+                raise Exception(f'Unexpected contentType: {v}')
+            if ('mainSuperTag' not in v) or (not isinstance(v['mainSuperTag'], dict)):
+                raise Exception(f'Invalid mainSuperTag: {v}')
+            main_super_tag = v['mainSuperTag']
+            if 'slug' not in main_super_tag:
+                raise Exception(f'No slug in mainSuperTag: {v}')
+            if 'facebookEngagement' in v:
+                v.pop('facebookEngagement')
+                articles_json.touch(k)
+            category = main_super_tag['slug']
+            category_name = main_super_tag.get('name', '')
+            ensure_category(category, category_name)
         try:
-            articles_json.read()
-            for k, v in articles_json.items():
-                if ('contentType' in v) and (v['contentType'] != 'article'):
-                    raise Exception(f'Unexpected contentType: {v}')
-                if ('mainSuperTag' not in v) or (not isinstance(v['mainSuperTag'], dict)):
-                    raise Exception(f'Invalid mainSuperTag: {v}')
-                main_super_tag = v['mainSuperTag']
-                if 'slug' not in main_super_tag:
-                    raise Exception(f'No slug in mainSuperTag: {v}')
-                if 'facebookEngagement' in v:
-                    v.pop('facebookEngagement')
-                category = main_super_tag['slug']
-                category_name = main_super_tag.get('name', '')
-                ensure_category(category, category_name)
-                articles_json[int(k)] = v
-
-            telex2_json.read()
-
-            try:
-                # noinspection PyShadowingNames
-                config = get_config()
-                telex_config = config['telex']
-                useragent = telex_config['useragent']
-
-                articles_per_page = telex_config.getint('articles_per_page', fallback=25)
-                articles = ListAsDictJsonText()
-                page = 1
-                while True:
-                    telex_api_url = telex_config['api_url'] + f'?perPage={articles_per_page}&page={page}'
-                    log.debug(f'API: {telex_api_url}')
-                    content = download_content(telex_api_url, useragent)
-                    Path('articles.api.json').write_text(content, encoding='utf-8')
-                    json_data = json.loads(content)
-                    if isinstance(json_data, list):
-                        articles.read_list(json_data)
+            config_service.flush()
+        except:
+            log.exception(f'Unable to write config: {config_service.path}')
+
+        telex2_json.refresh()
+
+    try:
+        # noinspection PyShadowingNames
+        config = get_config()
+        telex_config = config['telex']
+        useragent = telex_config['useragent']
+
+        articles_per_page = telex_config.getint('articles_per_page', fallback=25)
+        articles = ListAsDictJsonText()
+        changed_ids = set()
+        retention_days = telex_config.getint('articles_retention_days', fallback=0)
+        retention_cutoff = time.time() - retention_days * 86400
+        page = 1
+        while True:
+            telex_api_url = telex_config['api_url'] + f'?perPage={articles_per_page}&page={page}'
+            log.debug(f'API: {telex_api_url}')
+            with metrics.phase('api'):
+                content = download_content(telex_api_url, useragent)
+                Path('articles.api.json').write_text(content, encoding='utf-8')
+                json_data = json.loads(content)
+                if isinstance(json_data, list):
+                    articles.read_list(json_data)
+                else:
+                    if isinstance(json_data, dict) and ('items' in json_data):
+                        articles.read_list(json_data['items'])
                     else:
-                        if isinstance(json_data, dict) and ('items' in json_data):
-                            articles.read_list(json_data['items'])
-                        else:
-                            raise Exception(f'Unexpected JSON structure')
-                    new_article = False
-                    for k, v in articles.items():
-                        if 'facebookEngagement' in v:
-                            v.pop('facebookEngagement')
-                        if k in articles_json:
-                            update_item(str(k), v, articles_json[k])
-                        else:
-                            articles_json[k] = v
-                            new_article = True
-                    if not new_article:
-                        break
-                    if len(articles) < articles_per_page:
-                        break
-                    page += 1
-
-                expected_types = telex_config.get('expected_types', '').split(',')
-                ignore_types = telex_config.get('ignore_types', '').split(',')
-                for k, v in articles_json.items():
-                    item_type = v['type']
-                    if item_type in ignore_types:
-                        continue
-                    if item_type not in expected_types:
-                        log.warning(f'Unexpected type ({item_type}): {k}')
-                    if not v['active']:
-                        log.warning(f'not active: {k}')
-                        continue
-                    article_date = datetime.utcfromtimestamp(v['pubDate'])
-                    url_path = v['slug']
-                    if not re.fullmatch(r'[\w-]+', url_path):
-                        log.error(url_path)
-                    if url_path not in telex2_json:
-                        log.info(f'New article: {url_path}')
-                        telex2_json[url_path] = {}
-                    telex2_json[url_path]['article_date'] = datetime2iso8601(article_date) + 'Z'
-                    telex2_json[url_path]['article_title'] = v['title']
-                    telex2_json[url_path]['category'] = v['mainSuperTag']['slug']
-                    telex2_json[url_path]['date_dir'] = article_date.strftime('%Y/%m/%d')
-                    if v['english']:
-                        telex2_json[url_path]['english'] = True
-
-                submissions_already_posted = 0
-                while submissions_already_posted < 25:
-                    oldest_url = None
-                    remaining_articles = 0
-                    for k, v in telex2_json.items():
-                        if 'parse_date' in v:
-                            v.pop('parse_date')
-                        if v.get('reddit_date', None) not in [None, '']:
-                            continue
-                        article_date = v.get('article_date', None)
-                        if article_date in [None, '']:
-                            log.warning('No article_date: ' + str(v))
-                            continue
-                        remaining_articles += 1
-                        if (oldest_url is None) or (article_date < telex2_json[oldest_url]['article_date']):
-                            oldest_url = k
-                    if oldest_url is None:
-                        break
-                    oldest = telex2_json[oldest_url]
-                    article_title = oldest.get('article_title', '').strip()
-                    if article_title == '':
-                        raise Exception(f'No article_title: {oldest_url}')
-                    full_url = 'https://telex.hu/' + oldest['category'] + '/' + oldest['date_dir'] + '/' + oldest_url
-                    log.info(f'Submit: {full_url}')
-                    reddit = get_reddit()
-                    subreddit = reddit.subreddit(config['reddit']['subreddit'])
-                    utc_time_str = ''
-                    submission = None
-                    submission_already_posted = False
-                    for old_submission in subreddit.search('url:' + full_url, sort='new', limit=1):
-                        submission_already_posted = True
-                        submission = old_submission
-                        log.info(f'Submission already posted: {submission.permalink}')
-                    if submission is None:
-                        try:
-                            submission = subreddit.submit(
-                                title=article_title,
-                                selftext=None,
-                                url=full_url,
-                                flair_id=None,
-                                flair_text=None,
-                                resubmit=False,
-                                send_replies=False)
-                        except praw.exceptions.RedditAPIException as e:
-                            for eitem in e.items:
-                                if eitem.error_type != 'ALREADY_SUB':
-                                    raise
-                                if eitem.field != 'url':
-                                    raise
-                                log.warning(eitem.error_message)
-                                submission_already_posted = True
-                                utc_time_str = datetime2iso8601(datetime.now())
-                    if submission_already_posted:
-                        submissions_already_posted += 1
-                    if submission:
-                        utc_time_str = datetime2iso8601(datetime.fromtimestamp(submission.created_utc)) + 'Z'
-                    telex2_json[oldest_url]['reddit_date'] = utc_time_str
-                    telex2_json[oldest_url]['reddit_url'] = '' if submission is None else submission.permalink
-                    remaining_articles -= 1
-                    if submission:
-                        if ('english' in telex2_json[oldest_url]) and (telex2_json[oldest_url]['english']):
-                            collection = subreddit.collections(config['reddit']['english_collection_id'])
-                            reddit_url = 'https://reddit.com' + submission.permalink
-                            log.info(f'Add new english post to collection: {reddit_url}')
-                            try:
-                                collection.mod.add_post(reddit_url)
-                            except praw.exceptions.RedditAPIException as e:
-                                for eitem in e.items:
-                                    log.error(eitem.error_message)
-                            if 'telex' in article_title.lower():
-                                log.warning(f'Telex in title (internal post?): {article_title}')
-                            subreddit_english = config['reddit']['subreddit_english']
-                            log.info(f'Submit to {subreddit_english}: {full_url}')
-                            subreddit_english = reddit.subreddit(subreddit_english)
-                            submission = None
-                            for old_submission in subreddit_english.search('url:' + full_url, sort='new', limit=1):
-                                submission = old_submission
-                                log.info(f'Submission already posted: {submission.permalink}')
-                            if submission is None:
-                                try:
-                                    submission = subreddit_english.submit(
-                                        title=article_title,
-                                        selftext=None,
-                                        url=full_url,
-                                        flair_id=None,
-                                        flair_text=None,
-                                        resubmit=False,
-                                        send_replies=False)
-                                except praw.exceptions.RedditAPIException as e:
-                                    for eitem in e.items:
-                                        if eitem.error_type != 'ALREADY_SUB':
-                                            raise
-                                        if eitem.field != 'url':
-                                            raise
-                                        log.warning(eitem.error_message)
-                            if submission:
-                                telex2_json[oldest_url]['reddit_english_url'] = submission.permalink
-                    if not submission_already_posted:
-                        break
-            finally:
+                        raise Exception(f'Unexpected JSON structure')
+            with metrics.phase('merge'):
+                new_article = False
+                for k, v in articles.items():
+                    if 'facebookEngagement' in v:
+                        v.pop('facebookEngagement')
+                    if (retention_days > 0) and (v.get('pubDate', retention_cutoff) < retention_cutoff):
+                        if (k in articles_json) and is_compact(articles_json[k]):
+                            v = compact_article(v)
+                    if k in articles_json:
+                        recorded = change_log.recorded
+                        update_item(str(k), v, articles_json[k])
+                        if change_log.recorded != recorded:
+                            articles_json.touch(k)
+                            metrics.inc('articles_changed_total')
+                            changed_ids.add(k)
+                    else:
+                        articles_json[k] = v
+                        new_article = True
+                        metrics.inc('articles_new_total')
+                        changed_ids.add(k)
+                metrics.inc('articles_merged_total', len(articles))
+            if not new_article:
+                break
+            if len(articles) < articles_per_page:
+                break
+            page += 1
+
+        if retention_days > 0:
+            with metrics.phase('compact'):
+                archive_path = telex_config.get('articles_archive', '')
+                compact_articles(articles_json, retention_days, Path(archive_path) if archive_path else None)
+
+        with metrics.phase('projection'):
+            project_articles(articles_json, telex2_json, telex_config, changed_ids)
+
+        collect_interval = telex_config.getint('collect_interval', fallback=0)
+        if (collect_interval > 0) and (time.monotonic() >= next_collect_time):
+            next_collect_time = time.monotonic() + collect_interval
+            if link_collector is None:
+                link_collector = LinkCollector(
+                    config['collect_links'],
+                    useragent,
+                    max_workers=telex_config.getint('collect_workers', fallback=4),
+                    max_links=telex_config.getint('collect_max_links', fallback=0),
+                    metrics=metrics,
+                    log=log)
+            with metrics.phase('collect'):
+                listings = link_collector.collect()
+                log.debug(f'Collected {len(listings)} links from {len(link_collector.sources)} sources')
+                tag_listings(telex2_json, listings)
+
+        with metrics.phase('submit'):
+            if router is None:
+                router = Router(submit_route, create_reddit, log=log)
+            router.configure(load_routes(config))
+            apply_route_results(telex2_json)
+            if leases is not None:
+                sync_pending(telex2_json)
+                remaining_articles = submit_claimed(cluster_categories())
+                sync_pending(telex2_json)
+            submissions_already_posted = 0
+            while (leases is None) and (submissions_already_posted < 25):
+                oldest_url, remaining_articles = find_oldest_article(telex2_json)
+                if oldest_url is None:
+                    break
+                submission_already_posted = submit_article(oldest_url, telex2_json[oldest_url])
+                remaining_articles -= 1
+                if not submission_already_posted:
+                    break
+                submissions_already_posted += 1
+            enqueue_routes(telex2_json)
+    finally:
+        with metrics.phase('write'):
+            change_log.flush()
+            if persistence is not None:
+                persistence.submit(articles_json, create_backup=True, check_for_changes=True)
+                persistence.submit(telex2_json, create_backup=True, check_for_changes=True)
+            else:
                 articles_json.write(create_backup=True, check_for_changes=True)
                 telex2_json.write(create_backup=True, check_for_changes=True)
+        for state_file in [articles_json, telex2_json]:
+            if state_file.path.is_file():
+                metrics.set('state_file_bytes', state_file.path.stat().st_size, file=state_file.path.name)
+    return remaining_articles
+
+
+def check_categories_in_background():
+    def run():
+        global category_check_error
+        try:
+            check_categories(create_reddit())
+            log.debug('Categories verified')
+        except BaseException as e:
+            log.exception('Category check failed')
+            category_check_error = e
+
+    thread = threading.Thread(target=run, name='check_categories', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    startup_config = get_config().get('startup', ConfigSection('startup', {}))
+    fast_start = startup_config.getboolean('fast_start', fallback=False)
+    if not fast_start:
+        check_categories()
+
+    remaining_articles = 0
+    articles_json = ListAsDictJsonGzip('articles.json.gz', log=log)
+    telex2_json = PartitionedJsonGzip(
+        'telex2',
+        legacy_filename='telex2.json.gz',
+        hot_days=get_config()['telex'].getint('hot_days', fallback=7),
+        log=log)
+    cycles = 0
+    while True:
+        cycle_start = time.perf_counter()
+        if profiler is not None:
+            profiler.start_cycle()
+        try:
+            remaining_articles = run_cycle(articles_json, telex2_json)
         except urllib.error.HTTPError as e:
             log.error(f'Unable to download URL ({e}): {e.url}')
             time.sleep(10 * 60)
@@ -440,6 +740,20 @@ def main():
             log.error(f'Reddit error: {e}')
         except:
             log.exception('Exception!')
+        cycle_seconds = time.perf_counter() - cycle_start
+        if profiler is not None:
+            profiler.end_cycle(cycle_seconds)
+        cycles += 1
+        if fast_start and (cycles == 1):
+            check_categories_in_background()
+        if category_check_error is not None:
+            raise category_check_error
+        metrics.inc('cycles_total')
+        metrics.set('cycle_last_seconds', cycle_seconds)
+        metrics_config = get_config().get('metrics', ConfigSection('metrics', {}))
+        summary_every = metrics_config.getint('summary_every', fallback=0)
+        if (summary_every > 0) and (cycles % summary_every == 0):
+            log.info(f'Metrics after {cycles} cycles: {metrics.summary()}')
 
         check_interval = get_config()['telex'].getint('check_interval')
         if remaining_articles > 0:
@@ -449,15 +763,63 @@ def main():
 
 
 if __name__ == '__main__':
-    config = None
-    config_path = Path(__file__).with_suffix('.ini')
-    config_timestamp = None
-    if not check_config():
-        raise Exception(f'Unable to read config: {config_path}')
+    config_service = ConfigService(Path(__file__).with_suffix('.ini'), log=log)
+    if not config_service.check():
+        raise Exception(f'Unable to read config: {config_service.path}')
+    config_service.subscribe(on_config_changed)
     log_path = Path('log')
     log_config_path = log_path.joinpath('config')
-    log_config.load_log_config(log_config_path, log_config_path.joinpath('handler'))
+    logging_config = config_service.get().get('logging', ConfigSection('logging', {}))
+    log_config.load_log_config(
+        log_config_path,
+        log_config_path.joinpath('handler'),
+        use_queue=logging_config.getboolean('use_queue', fallback=True),
+        queue_size=logging_config.getint('queue_size', fallback=10000),
+        queue_policy=logging_config.get('queue_policy', fallback='drop'),
+        queue_batch_size=logging_config.getint('queue_batch_size', fallback=100))
+
+    changes_config = config_service.get().get('changes', ConfigSection('changes', {}))
+    changes_path = changes_config.get('path', fallback='')
+    if changes_path != '':
+        change_log.open(
+            changes_path,
+            max_bytes=changes_config.getint('max_bytes', fallback=10 * 1024 * 1024),
+            backup_count=changes_config.getint('backup_count', fallback=10))
+
+    profiler = CycleProfiler(log_path.joinpath('profile'), log=log)
+    configure_profiler(config_service.get())
+    profiler.install_signal_handler()
+
+    metrics_config = config_service.get().get('metrics', ConfigSection('metrics', {}))
+    metrics_port = metrics_config.getint('port', fallback=0)
+    if metrics_port > 0:
+        metrics.serve(metrics_port, metrics_config.get('host', fallback='127.0.0.1'))
+
+    persistence_config = config_service.get().get('persistence', ConfigSection('persistence', {}))
+    persistence_workers = persistence_config.getint('workers', fallback=0)
+    if persistence_workers > 0:
+        persistence = PersistenceExecutor(
+            max_workers=persistence_workers,
+            max_in_flight=persistence_config.getint('max_in_flight', fallback=4),
+            log=log)
+
+    cluster_config = config_service.get().get('cluster', ConfigSection('cluster', {}))
+    if cluster_config.getboolean('enabled', fallback=False):
+        leases = LeaseTable(
+            cluster_config.get('database', fallback='telex2reddit.leases.sqlite'),
+            instance_id=cluster_config.get('instance_id', fallback='') or None,
+            lease_seconds=cluster_config.getfloat('lease_seconds', fallback=900.0),
+            log=log)
 
     log.info(f'Started at: {datetime.now().replace(microsecond=0)}')
-    main()
+    try:
+        main()
+    finally:
+        if persistence is not None:
+            persistence.shutdown()
+        if leases is not None:
+            leases.close()
+        if router is not None:
+            router.shutdown()
+        change_log.close()
     log.info(f'Finished at: {datetime.now().replace(microsecond=0)}')
@@ -1,28 +1,96 @@
-import dateutil.parser
+from datetime import datetime
+import functools
 import html.parser
 import logging.config
 import re
 
 
-class HungarianParserInfo(dateutil.parser.parserinfo):
-    MONTHS = ['január',
-              'február',
-              'március',
-              'április',
-              'május',
-              'június',
-              'július',
-              'augusztus',
-              'szeptember',
-              'október',
-              'november',
-              'december']
+MONTHS = ['január',
+          'február',
+          'március',
+          'április',
+          'május',
+          'június',
+          'július',
+          'augusztus',
+          'szeptember',
+          'október',
+          'november',
+          'december']
+
+
+@functools.lru_cache(maxsize=None)
+def _hungarian_parser_info_class() -> type:
+    import dateutil.parser  # imported on first use, only needed by the fallback parser
+
+    class HungarianParserInfo(dateutil.parser.parserinfo):
+        MONTHS = MONTHS
+
+    return HungarianParserInfo
+
+
+def __getattr__(name: str):
+    if name == 'HungarianParserInfo':
+        return _hungarian_parser_info_class()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+_month_numbers = {name: number for number, name in enumerate(MONTHS, start=1)}
+_date_pattern = re.compile(r'(\d{4})\.\s*([^\W\d_]+)\s+(\d{1,2})\.(?:\s*[–-]\s*(\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+_date_parser = None
+_date_parse_counters = {'fast_path': 0, 'fallback': 0}
+
+
+def _parse_date_fast(date_text: str) -> [datetime, None]:
+    match = _date_pattern.fullmatch(date_text)
+    if not match:
+        return None
+    month = _month_numbers.get(match.group(2).lower(), None)
+    if month is None:
+        return None
+    year, _, day, hour, minute, second = match.groups(default='0')
+    return datetime(int(year), month, int(day), int(hour), int(minute), int(second))
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date(date_text: str) -> datetime:
+    global _date_parser
+    result = _parse_date_fast(date_text)
+    if result is not None:
+        _date_parse_counters['fast_path'] += 1
+        return result
+    _date_parse_counters['fallback'] += 1
+    if _date_parser is None:
+        import dateutil.parser
+
+        _date_parser = dateutil.parser.parser(_hungarian_parser_info_class()())
+    return _date_parser.parse(date_text, fuzzy=True)
+
+
+link_pattern = re.compile(r'(?:(?:https?://)(?:www\.)?telex\.hu)?/+([\w-]+/+\d+/+\d+/+\d+(?:/+[\w-]+)+)/*', re.IGNORECASE)
+_slashes_pattern = re.compile(r'/+')
+
+
+def normalize_link(url: str) -> [str, None]:
+    match = link_pattern.fullmatch(url.strip().lower())
+    if not match:
+        return None
+    return _slashes_pattern.sub('/', match.group(1))
+
+
+def date_parse_stats() -> dict:
+    cache_info = parse_date.cache_info()
+    return {
+        'cache_hits': cache_info.hits,
+        'cache_misses': cache_info.misses,
+        'cache_size': cache_info.currsize,
+        'fast_path': _date_parse_counters['fast_path'],
+        'fallback': _date_parse_counters['fallback']}
 
 
 class TelexHTMLParser(html.parser.HTMLParser):
     def __init__(self, log: logging.Logger = None):
         html.parser.HTMLParser.__init__(self)
-        self._link_pattern = re.compile(r'(?:(?:https?://)(?:www\.)?telex\.hu)?/+([\w-]+/+\d+/+\d+/+\d+(?:/+[\w-]+)+)/*', re.IGNORECASE)
         self._in_article_date = False
         self._in_article_title = False
         self._in_article_title_bottom = False
@@ -71,9 +139,9 @@ class TelexHTMLParser(html.parser.HTMLParser):
                     continue
                 if attr[1] is None:
                     continue
-                match = self._link_pattern.fullmatch(attr[1].strip().lower())
-                if match:
-                    self.links.append(match.group(1))
+                link = normalize_link(attr[1])
+                if link is not None:
+                    self.links.append(link)
                 return
 
     def handle_endtag(self, tag: str):
@@ -94,10 +162,10 @@ class TelexHTMLParser(html.parser.HTMLParser):
             if date_text == '':
                 return
             try:
-                self.article_date = dateutil.parser.parser(HungarianParserInfo()).parse(date_text, fuzzy=True)
+                self.article_date = parse_date(date_text)
             except:
                 if self._log:
-                    self._log.exception(f'Exception: self.article_date = dateutil.parser.parser(HungarianParserInfo()).parse("{data.strip()}", fuzzy = True)')
+                    self._log.exception(f'Exception: self.article_date = parse_date("{date_text}")')
                 else:
                     raise
             return